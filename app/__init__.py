@@ -1,32 +1,76 @@
+import os
+
+from .startup import startup_profile
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from .config import Config
 from flask_cors import CORS
-from flask_migrate import Migrate
-from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
+from werkzeug.exceptions import HTTPException
+from .compression import Compression
+from .json_provider import select_json_provider
+from .negotiation import NegotiatingRequest, error_response
 # Initialize the database
 db = SQLAlchemy()
-migrate = Migrate()
-bcrypt = Bcrypt()
 jwt = JWTManager()
+compress = Compression()
+
+from . import models, changes, events
+from .cache import issue_cache, user_cache
+from .touch import issue_touch
+from .tag_index import tag_index
+from .health import readiness
+from .tokens import revocations
+from .querybudget import query_counter
 
-from . import models
+def init_migrate(app):
+    # Flask-Migrate pulls in alembic (~100 ms) and only the `flask db`
+    # commands use it, so web workers skip it
+    from flask_migrate import Migrate
+    Migrate(app, db)
 
 def create_app():
-    
-    app = Flask(__name__)
-    app.config.from_object(Config)
+    profile = startup_profile
+    with profile.step("Flask() and config"):
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        app.json = select_json_provider(app)
+        # jsonify() and request.get_json() also speak msgpack when the client asks for it
+        app.request_class = NegotiatingRequest
+        app.register_error_handler(HTTPException, error_response)
     # Optionally configure JWT token options here
     # Enable CORS with configurable origins
-    CORS(app, origins=app.config['ALLOWED_ORIGINS'], supports_credentials=True)
+    with profile.step("CORS"):
+        CORS(app, origins=app.config['ALLOWED_ORIGINS'], supports_credentials=True)
 
     # Initialize the app with the database
-    db.init_app(app)
-    migrate.init_app(app, db)
-    bcrypt.init_app(app)
-    jwt.init_app(app)
-    from .routes import main
-    app.register_blueprint(main)
+    with profile.step("extensions"):
+        db.init_app(app)
+        if os.getenv("FLASK_RUN_FROM_CLI") == "true" or app.config['EAGER_MIGRATE']:
+            init_migrate(app)
+        jwt.init_app(app)
+        compress.init_app(app)
+        issue_cache.init_app(app)
+        user_cache.init_app(app)
+        issue_touch.init_app(app)
+        tag_index.init_app(app)
+        readiness.init_app(app)
+        query_counter.init_app(app)
+    with profile.step("blueprints and commands"):
+        from .routes import main
+        app.register_blueprint(main)
+        from .archive import archive_issues_command
+        app.cli.add_command(archive_issues_command)
+        from .changes import prune_changes_command
+        app.cli.add_command(prune_changes_command)
+        from .partitions import partition_comments_command, partition_issues_command
+        app.cli.add_command(partition_comments_command)
+        app.cli.add_command(partition_issues_command)
+        from .jobs import run_jobs_command
+        app.cli.add_command(run_jobs_command)
 
+    if profile.enabled:
+        profile.uninstall()
+        app.extensions['startup_profile'] = profile
+        print(profile.report())
     return app
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+import click
+from sqlalchemy import DateTime, delete, insert, literal, select
+
+from . import db
+from .changes import log_changes
+from .models import ArchivedComment, ArchivedIssue, ArchivedIssueTag, Comment, Issue, IssueTag, Status
+
+# (hot table, archive table, column that points at the issue)
+TABLES = [
+    (Issue.__table__, ArchivedIssue.__table__, 'id'),
+    (Comment.__table__, ArchivedComment.__table__, 'issue_id'),
+    (IssueTag.__table__, ArchivedIssueTag.__table__, 'issue_id'),
+]
+
+
+def _copy(source, target, issue_column, issue_ids, now):
+    names = [column.name for column in target.columns if column.name in source.c]
+    values = [source.c[name] for name in names]
+    if 'archived_at' in target.c:
+        names.append('archived_at')
+        values.append(literal(now, DateTime))
+    rows = select(*values).where(source.c[issue_column].in_(issue_ids))
+    db.session.execute(insert(target).from_select(names, rows))
+
+
+def _move(issue_ids, to_archive):
+    pairs = TABLES if to_archive else [(target, source, column) for source, target, column in TABLES]
+    now = datetime.now(timezone.utc)
+    # Parents first on insert, children first on delete
+    for source, target, column in pairs:
+        _copy(source, target, column, issue_ids, now)
+    for source, target, column in reversed(pairs):
+        db.session.execute(delete(source).where(source.c[column].in_(issue_ids)))
+
+
+def _comments_of(issue_ids):
+    return db.session.execute(select(Comment.id, Comment.issue_id).where(Comment.issue_id.in_(issue_ids))).all()
+
+
+def archive_issues(status_id, cutoff, batch_size=500):
+    """Move issues in `status_id` last updated before `cutoff`, with their
+    comments and tag links, into the archive tables. Returns the number moved."""
+    moved = 0
+    while True:
+        issue_ids = db.session.execute(
+            select(Issue.id)
+            .where(Issue.status_id == status_id, Issue.updated_at < cutoff)
+            .order_by(Issue.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not issue_ids:
+            return moved
+        comments = _comments_of(issue_ids)
+        _move(issue_ids, to_archive=True)
+        # Archived issues and their comments leave the hot tables, which is
+        # what a delete means to sync clients
+        log_changes(db.session, [(('comment', comment_id, issue_id), 'delete') for comment_id, issue_id in comments]
+                    + [(('issue', issue_id, issue_id), 'delete') for issue_id in issue_ids])
+        db.session.commit()
+        moved += len(issue_ids)
+
+
+def restore_issue(issue_id):
+    """Move an archived issue back into the hot tables. Returns False if it is not archived."""
+    if db.session.get(ArchivedIssue, issue_id) is None:
+        return False
+    _move([issue_id], to_archive=False)
+    log_changes(db.session, [(('issue', issue_id, issue_id), 'upsert')]
+                + [(('comment', comment_id, issue_id), 'upsert') for comment_id, _ in _comments_of([issue_id])])
+    db.session.commit()
+    db.session.expire_all()
+    return True
+
+
+def delete_archived_issue(issue_id):
+    """Delete an archived issue with its comments and tag links. Returns False if it is not archived."""
+    if db.session.get(ArchivedIssue, issue_id) is None:
+        return False
+    for _, archived, column in reversed(TABLES):
+        db.session.execute(delete(archived).where(archived.c[column] == issue_id))
+    # Sync clients got its tombstones when it was archived, but cached
+    # include_archived pages still list it
+    db.session.info['issues_written'] = True
+    db.session.commit()
+    return True
+
+
+@click.command('archive-issues')
+@click.option('--status', 'status_name', default=None, help='Status to archive (default: ARCHIVE_STATUS).')
+@click.option('--days', type=int, default=None, help='Minimum age in days since the last update (default: ARCHIVE_AFTER_DAYS).')
+@click.option('--batch-size', type=int, default=500)
+def archive_issues_command(status_name, days, batch_size):
+    """Move old issues in the archive status out of the hot issues table."""
+    from flask import current_app
+
+    status_name = status_name or current_app.config['ARCHIVE_STATUS']
+    days = days if days is not None else current_app.config['ARCHIVE_AFTER_DAYS']
+    status = Status.query.filter_by(name=status_name).first()
+    if status is None:
+        raise click.ClickException(f"Unknown status '{status_name}'.")
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    moved = archive_issues(status.id, cutoff, batch_size)
+    click.echo(f"Archived {moved} issue(s) in status '{status_name}' not updated for {days} day(s).")
@@ -0,0 +1,118 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, request
+from werkzeug.test import EnvironBuilder
+
+from . import db
+from .health import pool_usage
+from .negotiation import MIMETYPES, encode_body, msgpack, response_format
+
+# Routes that must not run inside a batch
+EXCLUDED_ENDPOINTS = {"main.batch", "main.stream"}
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def _pool(workers):
+    with _executor_lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch")
+        return _executors[workers]
+
+
+def _workers(app):
+    """BATCH_MAX_WORKERS, capped below the connection pool's capacity.
+
+    Every parallel sub-request checks out its own connection, and the
+    request running the batch may already hold one; more workers than the
+    pool can serve would only queue on it, or time out.
+    """
+    workers = app.config["BATCH_MAX_WORKERS"]
+    _, capacity = pool_usage(db.engine.pool)
+    if capacity is not None:
+        workers = min(workers, capacity - 1)
+    return workers
+
+
+def _dispatch(app, environ, fmt):
+    """Run one GET the way the WSGI app would: before/after request hooks,
+    the view, error handlers and teardown. Returns (status, body bytes in
+    the batch's format)."""
+    with app.request_context(environ):
+        if request.url_rule is not None and request.url_rule.endpoint in EXCLUDED_ENDPOINTS:
+            return 400, _encode({"error": f"{request.path} cannot be batched."}, fmt)
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            response = app.handle_exception(e)
+        if response.mimetype == MIMETYPES[fmt]:
+            return response.status_code, response.get_data()
+        if response.status_code >= 400:
+            # Not a body the envelope can splice in; report the status line instead
+            return response.status_code, _encode({"error": response.status.split(" ", 1)[1].title()}, fmt)
+        return response.status_code, _encode(response.get_data(as_text=True), fmt)
+
+
+def _encode(obj, fmt):
+    body = encode_body(obj, fmt)
+    return body.encode("utf-8") if isinstance(body, str) else body
+
+
+def _dispatch_in_own_context(app, environ, fmt):
+    # Its own app context gives each sub-request its own g and database
+    # session, which the app context teardown removes again
+    with app.app_context():
+        return _dispatch(app, environ, fmt)
+
+
+def _environ(path):
+    """WSGI environ for a sub-request of the current one. Only Authorization
+    and Accept are passed on; in particular not Accept-Encoding, since the
+    envelope is compressed once as a whole."""
+    headers = {name: value for name, value in request.headers.items() if name in ("Authorization", "Accept")}
+    overrides = {"REMOTE_ADDR": request.remote_addr} if request.remote_addr else None
+    builder = EnvironBuilder(path=path, method="GET", base_url=request.url_root, headers=headers,
+                             environ_overrides=overrides)
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+def _envelope(paths, results, fmt):
+    """{"responses": [{"path", "status", "body"}, ...]} with every sub-response
+    body spliced in as already-encoded bytes; JSON and msgpack both allow it."""
+    if fmt == "msgpack":
+        packer = msgpack.Packer(use_bin_type=True)
+        parts = [packer.pack_map_header(1), packer.pack("responses"), packer.pack_array_header(len(paths))]
+        for path, (status, body) in zip(paths, results):
+            parts += [packer.pack_map_header(3), packer.pack("path"), packer.pack(path),
+                      packer.pack("status"), packer.pack(status), packer.pack("body"), body]
+        return b"".join(parts)
+    parts = [
+        b'{"path":%s,"status":%d,"body":%s}' % (json.dumps(path).encode("utf-8"), status, body)
+        for path, (status, body) in zip(paths, results)
+    ]
+    return b'{"responses":[' + b",".join(parts) + b"]}"
+
+
+def run_batch(paths, parallel=False):
+    """Dispatch GET sub-requests and return the batch response.
+
+    Each sub-request runs in its own app context, so none of them sees
+    another's session state; with `parallel` they run on the pool, or one
+    after the other when the connection pool leaves no room for that.
+    """
+    app = current_app._get_current_object()
+    fmt = response_format()
+    environs = [_environ(path) for path in paths]
+    workers = _workers(app) if parallel else 1
+    if workers > 1 and len(paths) > 1:
+        pool = _pool(workers)
+        results = list(pool.map(lambda environ: _dispatch_in_own_context(app, environ, fmt), environs))
+    else:
+        results = [_dispatch_in_own_context(app, environ, fmt) for environ in environs]
+    return app.response_class(_envelope(paths, results, fmt), mimetype=MIMETYPES[fmt])
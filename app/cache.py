@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+from . import db
+from .models import Priority, Status, Tag
+
+GENERATION_KEY = 'issues:generation'
+
+
+class LRUBackend:
+    """Per-process LRU. Its generation only sees this worker's writes, so the
+    TTL bounds how long another worker's write can go unnoticed."""
+
+    def __init__(self, maxsize=1024, ttl=5):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def generation(self):
+        return self._generation
+
+    def bump(self):
+        with self._lock:
+            self._generation += 1
+
+
+class RedisBackend:
+    """Shared store: entries and the generation counter are visible to every worker."""
+
+    def __init__(self, url, ttl=30, generation_key=GENERATION_KEY):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.generation_key = generation_key
+
+    def get(self, key):
+        # Raw bytes: cached bodies are JSON text or msgpack
+        return self.client.get(key)
+
+    def set(self, key, value):
+        self.client.set(key, value, ex=self.ttl)
+
+    def generation(self):
+        return int(self.client.get(self.generation_key) or 0)
+
+    def bump(self):
+        self.client.incr(self.generation_key)
+
+
+class ResponseCache:
+    """Caches serialized list responses under a generation counter.
+
+    For issue_cache every committed issue or comment write, and every change
+    to the tags, statuses and priorities issues are shown with, bumps the
+    generation, so older entries simply stop being looked up and age out of
+    the backend.
+    """
+
+    def __init__(self, app=None, config_prefix='ISSUE_CACHE', default_ttl=5):
+        self.config_prefix = config_prefix
+        self.default_ttl = default_ttl
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        prefix = self.config_prefix
+        backend = app.config.get(f'{prefix}_BACKEND', 'lru')
+        ttl = app.config.get(f'{prefix}_TTL', self.default_ttl)
+        if backend == 'redis':
+            self.backend = RedisBackend(app.config[f'{prefix}_URL'], ttl, f'{prefix.lower()}:generation')
+        elif backend == 'lru':
+            self.backend = LRUBackend(app.config.get(f'{prefix}_SIZE', 1024), ttl)
+        else:
+            self.backend = None
+
+    def key(self, namespace, **params):
+        normalized = '&'.join(f'{name}={value}' for name, value in sorted(params.items()) if value is not None)
+        return f'{namespace}:{self.backend.generation()}:{normalized}'
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def bump(self):
+        if self.backend is not None:
+            self.backend.bump()
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__ if self.backend else None,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'miss_ratio': self.misses / lookups if lookups else 0.0,
+            'generation': self.backend.generation() if self.backend else None,
+        }
+
+
+issue_cache = ResponseCache()
+# First pages of the user directory; only a short TTL and local bumps on user writes
+user_cache = ResponseCache(config_prefix='USER_CACHE', default_ttl=30)
+
+
+@event.listens_for(db.session, 'after_flush')
+def note_lookup_writes(session, flush_context):
+    """Cached issue pages embed tag, status and priority names, so renaming or deleting one invalidates them."""
+    if any(isinstance(obj, (Tag, Status, Priority)) for obj in (*session.dirty, *session.deleted)):
+        session.info['issues_written'] = True
+
+
+@event.listens_for(db.session, 'after_commit')
+def bump_generation(session):
+    if session.info.pop('issues_written', False):
+        issue_cache.bump()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_generation_bump(session):
+    session.info.pop('issues_written', None)
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+
+import click
+from sqlalchemy import delete, event, func, select
+
+from . import db
+from .models import Change, ChangePrune, Comment, Issue
+from .txid import commit_horizon
+
+def _entity(obj):
+    if isinstance(obj, Issue):
+        return 'issue', obj.id, obj.id
+    if isinstance(obj, Comment):
+        return 'comment', obj.id, obj.issue_id
+    return None
+
+
+def flushed_entities(session):
+    """Yield ((entity, entity_id, issue_id), op, obj) for issues/comments in the current flush.
+
+    Only valid inside after_flush, where new/dirty/deleted still describe the flush.
+    """
+    for obj in session.new:
+        entity = _entity(obj)
+        if entity:
+            yield entity, 'upsert', obj
+    for obj in session.dirty:
+        entity = _entity(obj)
+        if entity and session.is_modified(obj):
+            yield entity, 'upsert', obj
+    for obj in session.deleted:
+        entity = _entity(obj)
+        if entity:
+            yield entity, 'delete', obj
+
+
+@event.listens_for(db.session, 'after_flush')
+def record_changes(session, flush_context):
+    """Append a change-log row for every issue/comment written in this flush.
+
+    Hooking the flush instead of the route handlers also catches rows removed
+    through ORM cascades, e.g. the comments of a deleted issue.
+    """
+    _append_changes(session, [(entity, op) for entity, op, obj in flushed_entities(session)])
+
+
+def log_changes(session, changes):
+    """Write ((entity, entity_id, issue_id), op) pairs to the change log.
+
+    Bulk Core writes that bypass the ORM flush (e.g. archiving) call this
+    directly so the feed, the issue cache and /api/stream still see them.
+    """
+    _append_changes(session, changes)
+    # The ORM flush raises its own events; these are published at commit
+    session.info.setdefault('core_changes', []).extend(changes)
+
+
+def _append_changes(session, changes):
+    if not changes:
+        return
+    now = datetime.now(timezone.utc)
+    session.connection().execute(Change.__table__.insert(), [
+        {'entity': name, 'entity_id': entity_id, 'issue_id': issue_id, 'op': op, 'changed_at': now}
+        for (name, entity_id, issue_id), op in changes
+    ])
+    session.info['issues_written'] = True
+
+
+def changes_since(since, limit):
+    """Latest change per entity committed after the token `since` (a txid, 0
+    for everything), oldest first, plus the next token and a has_more flag;
+    None when `since` is older than what the log still holds and the client
+    has to resync.
+
+    Only rows below the commit horizon are read, and a page ends on a
+    transaction boundary, so a transaction that commits later can never land
+    behind a token already handed out.
+    """
+    floor = db.session.execute(select(func.max(ChangePrune.txid))).scalar()
+    if floor is not None and since < floor:
+        return None
+
+    entries = Change.query.filter(Change.txid > since, Change.txid < commit_horizon()) \
+        .order_by(Change.txid, Change.id).limit(limit + 1).all()
+    has_more = len(entries) > limit
+    if has_more:
+        # Keep a transaction together; one larger than a page is returned whole
+        cut = entries[limit].txid
+        entries = [entry for entry in entries[:limit] if entry.txid != cut] or \
+            Change.query.filter(Change.txid == cut).order_by(Change.id).all()
+    latest = {}
+    for entry in entries:
+        latest[(entry.entity, entry.entity_id)] = entry
+    next_since = entries[-1].txid if entries else since
+    return sorted(latest.values(), key=lambda entry: (entry.txid, entry.id)), next_since, has_more
+
+
+def prune_changes(cutoff):
+    """Delete change log transactions that finished before `cutoff` and record
+    the new floor. Returns the number of rows removed."""
+    floor = db.session.execute(
+        select(func.max(Change.txid)).where(Change.changed_at < cutoff, Change.txid < commit_horizon())
+    ).scalar()
+    if floor is None:
+        return 0
+    removed = db.session.execute(delete(Change).where(Change.txid <= floor)).rowcount
+    db.session.add(ChangePrune(txid=floor, removed=removed))
+    db.session.commit()
+    return removed
+
+
+@click.command('prune-changes')
+@click.option('--days', type=int, default=None, help='Entries to keep, in days (default: CHANGES_RETENTION_DAYS).')
+def prune_changes_command(days):
+    """Drop old change log entries; clients holding older tokens get a resync response."""
+    from flask import current_app
+
+    days = days if days is not None else current_app.config['CHANGES_RETENTION_DAYS']
+    removed = prune_changes(datetime.now(timezone.utc) - timedelta(days=days))
+    click.echo(f"Removed {removed} change log row(s) older than {days} day(s).")
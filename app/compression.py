@@ -0,0 +1,82 @@
+import threading
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+class Compression:
+    """gzip/brotli response compression registered as an after_request hook."""
+
+    def __init__(self, app=None):
+        self._local = threading.local()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', True)
+        app.config.setdefault('COMPRESS_MIN_SIZE', 500)
+        app.config.setdefault('COMPRESS_LEVEL', 6)
+        app.config.setdefault('COMPRESS_BR_LEVEL', 4)
+        app.config.setdefault('COMPRESS_MIMETYPES', ['application/json', 'application/msgpack', 'text/plain', 'text/html'])
+        self.app = app
+        app.after_request(self.after_request)
+
+    def _gzip_template(self, level):
+        # zlib compressors cannot be reset after a flush, so keep one pristine
+        # object per thread and hand out cheap copies of it instead of paying
+        # for deflateInit on every response.
+        template = getattr(self._local, 'gzip', None)
+        if template is None or self._local.gzip_level != level:
+            template = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._local.gzip = template
+            self._local.gzip_level = level
+        return template
+
+    def gzip(self, data, level):
+        compressor = self._gzip_template(level).copy()
+        return compressor.compress(data) + compressor.flush()
+
+    def choose_encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted.quality('br') > 0:
+            return 'br'
+        if accepted.quality('gzip') > 0:
+            return 'gzip'
+        return None
+
+    def should_compress(self, response):
+        config = self.app.config
+        if not config['COMPRESS_ENABLED']:
+            return False
+        if response.status_code < 200 or response.status_code >= 300 or response.status_code == 204:
+            return False
+        if response.direct_passthrough or response.is_streamed:
+            return False
+        if 'Content-Encoding' in response.headers:
+            return False
+        if response.mimetype not in config['COMPRESS_MIMETYPES']:
+            return False
+        return (response.content_length or 0) >= config['COMPRESS_MIN_SIZE']
+
+    def after_request(self, response):
+        if not self.should_compress(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose_encoding()
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=self.app.config['COMPRESS_BR_LEVEL'])
+        else:
+            compressed = self.gzip(data, self.app.config['COMPRESS_LEVEL'])
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
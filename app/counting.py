@@ -0,0 +1,37 @@
+from flask import current_app, request
+from sqlalchemy import func, select
+from sqlalchemy.orm import Query
+
+from . import db
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def parse_count_mode():
+    mode = request.args.get("count", "exact")
+    return mode if mode in COUNT_MODES else "exact"
+
+
+def estimate_rows(stmt):
+    """The planner's row estimate for a SELECT, from EXPLAIN (no execution)."""
+    compiled = stmt.compile(dialect=db.engine.dialect, compile_kwargs={"render_postcompile": True})
+    plan = db.session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_rows(q, mode):
+    """Total for a list query as (total, mode actually used).
+
+    "estimate" trusts the planner only for large results; below
+    COUNT_ESTIMATE_THRESHOLD the exact count is cheap and is used instead.
+    """
+    if mode == "none":
+        return None, "none"
+    stmt = q.statement if isinstance(q, Query) else q
+    if mode == "estimate" and db.engine.dialect.name == "postgresql":
+        estimate = estimate_rows(stmt)
+        if estimate >= current_app.config["COUNT_ESTIMATE_THRESHOLD"]:
+            return estimate, "estimate"
+    if isinstance(q, Query):
+        return q.count(), "exact"
+    return db.session.execute(select(func.count()).select_from(stmt.subquery())).scalar(), "exact"
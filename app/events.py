@@ -0,0 +1,153 @@
+import json
+import queue
+import select
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, inspect, text
+
+from . import db
+from .changes import flushed_entities
+
+CHANNEL = 'issue_events'
+
+
+class Broker:
+    """In-process fan-out of issue/comment events to SSE subscribers.
+
+    Each subscriber gets a bounded queue; a subscriber that stops reading
+    loses events instead of growing memory without limit.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self):
+        q = queue.Queue(self.maxsize)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, evt):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(evt)
+            except queue.Full:
+                pass
+
+    def ensure_listener(self, app):
+        """Start the LISTEN thread that feeds NOTIFYs from every worker into this broker."""
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, args=(app,), daemon=True)
+                self._listener.start()
+
+    def _listen(self, app):
+        # One dedicated connection per worker, outside the pool, however many
+        # subscribers there are.
+        with app.app_context():
+            engine = db.engine
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        while True:
+            try:
+                conn = engine.dialect.loaded_dbapi.connect(*cargs, **cparams)
+                conn.autocommit = True
+                conn.cursor().execute(f'LISTEN {CHANNEL}')
+                while True:
+                    if select.select([conn], [], [], 30) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self.publish(json.loads(conn.notifies.pop(0).payload))
+            except Exception as e:
+                print(f"Error in event listener, reconnecting: {e}")
+                time.sleep(1)
+
+
+broker = Broker()
+
+
+def snapshot(entity, op, obj):
+    name, entity_id, issue_id = entity
+    evt = {'type': name, 'op': op, 'id': entity_id, 'issue_id': issue_id}
+    if name == 'issue':
+        evt['status_id'] = obj.status_id
+        evt['priority_id'] = obj.priority_id
+        evt['author_id'] = obj.author_id
+        # Never lazy-load inside a flush; unknown tags match any tag filter
+        if 'tags' in inspect(obj).dict:
+            evt['tags'] = [tag.id for tag in obj.tags]
+    return evt
+
+
+def matches(evt, filters):
+    """Apply ?issue_id= and the get_issues filters to an event.
+
+    Attribute filters only describe issues, so comment events are dropped
+    under them; the parent issue's own update event is still delivered.
+    Events from bulk writes carry no attributes and match any filter.
+    """
+    if filters.get('issue_id') is not None and evt['issue_id'] != filters['issue_id']:
+        return False
+    attribute_filters = [key for key in ('status_id', 'priority_id', 'author_id', 'tags') if filters.get(key)]
+    if not attribute_filters:
+        return True
+    if evt['type'] != 'issue':
+        return False
+    for key in ('status_id', 'priority_id', 'author_id'):
+        if filters.get(key) is not None and key in evt and evt[key] != filters[key]:
+            return False
+    if filters.get('tags') and evt.get('tags') is not None:
+        if not set(filters['tags']) & set(evt['tags']):
+            return False
+    return True
+
+
+def format_sse(evt):
+    return f"event: {evt['type']}.{evt['op']}\ndata: {json.dumps(evt)}\n\n"
+
+
+def queue_events(session, events):
+    if not events:
+        return
+    if current_app.config.get('EVENTS_PG_NOTIFY'):
+        # NOTIFY is transactional: other workers only see it if this commits
+        for evt in events:
+            session.connection().execute(text('SELECT pg_notify(:channel, :payload)'),
+                                         {'channel': CHANNEL, 'payload': json.dumps(evt)})
+    else:
+        session.info.setdefault('pending_events', []).extend(events)
+
+
+@event.listens_for(db.session, 'after_flush')
+def collect_events(session, flush_context):
+    queue_events(session, [snapshot(entity, op, obj) for entity, op, obj in flushed_entities(session)])
+
+
+@event.listens_for(db.session, 'before_commit')
+def collect_core_events(session):
+    """Events for the Core writes recorded with log_changes (archiving, jobs, buffered touches)."""
+    queue_events(session, [{'type': name, 'op': op, 'id': entity_id, 'issue_id': issue_id}
+                           for (name, entity_id, issue_id), op in session.info.pop('core_changes', [])])
+
+
+@event.listens_for(db.session, 'after_commit')
+def publish_events(session):
+    for evt in session.info.pop('pending_events', []):
+        broker.publish(evt)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_events(session):
+    session.info.pop('pending_events', None)
+    session.info.pop('core_changes', None)
@@ -0,0 +1,137 @@
+import ast
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from sqlalchemy import text
+
+from . import db
+
+_REVISION = re.compile(r"^revision\s*=\s*(.+)$", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision\s*=\s*(.+)$", re.M)
+
+
+def script_heads(versions_dir):
+    """Head revisions of the migration scripts, read without importing alembic."""
+    revisions, parents = set(), set()
+    for name in os.listdir(versions_dir):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, name), encoding="utf-8") as f:
+            source = f.read()
+        revision, down = _REVISION.search(source), _DOWN_REVISION.search(source)
+        if revision is None:
+            continue
+        revisions.add(ast.literal_eval(revision.group(1).strip()))
+        down = ast.literal_eval(down.group(1).strip()) if down else None
+        if isinstance(down, str):
+            parents.add(down)
+        elif down:
+            parents.update(down)
+    return revisions - parents
+
+
+def pool_usage(pool):
+    """(checked out, capacity) for a QueuePool; capacity is None when unbounded
+    or when the pool does not track checkouts (e.g. sqlite's static pools)."""
+    if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+        return None, None
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+    return pool.checkedout(), capacity
+
+
+def _database_revisions(engine, timeout_ms):
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+        return set(conn.execute(text("SELECT version_num FROM alembic_version")).scalars())
+
+
+class Readiness:
+    """Readiness probe: the database answers within READYZ_TIMEOUT_MS, the
+    connection pool has room and the schema is at the migration head.
+
+    The result is cached for READYZ_CACHE_SECONDS so load balancer probes cost
+    at most one round trip per worker per interval. The database query runs
+    on a single background thread, so a hung connect or a pool checkout that
+    would block is cut off by the timeout, and a still-running probe is
+    reported as a timeout rather than stacking up threads.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._heads = None
+        self._result = None
+        self._expires = 0.0
+        self._pending = None
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('READYZ_TIMEOUT_MS', 500)
+        app.config.setdefault('READYZ_CACHE_SECONDS', 1.0)
+        app.config.setdefault('READYZ_POOL_MAX_USAGE', 1.0)
+        app.config.setdefault('MIGRATIONS_VERSIONS_DIR',
+                              os.path.join(os.path.dirname(app.root_path), 'migrations', 'versions'))
+        self.app = app
+
+    @property
+    def heads(self):
+        if self._heads is None:
+            self._heads = script_heads(self.app.config['MIGRATIONS_VERSIONS_DIR'])
+        return self._heads
+
+    def _check_database(self, engine):
+        timeout_ms = self.app.config['READYZ_TIMEOUT_MS']
+        if self._pending is not None and not self._pending.done():
+            return {"ok": False, "error": "timeout"}, None
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="readyz")
+        start = time.perf_counter()
+        self._pending = self._executor.submit(_database_revisions, engine, timeout_ms)
+        try:
+            revisions = self._pending.result(timeout=timeout_ms / 1000)
+        except FutureTimeout:
+            return {"ok": False, "error": "timeout"}, None
+        except Exception as exc:
+            return {"ok": False, "error": type(exc).__name__}, None
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 1)}, revisions
+
+    def _check(self):
+        engine = db.engine
+        checks = {}
+
+        checked_out, capacity = pool_usage(engine.pool)
+        saturated = capacity is not None and checked_out >= capacity * self.app.config['READYZ_POOL_MAX_USAGE']
+        checks["pool"] = {"ok": not saturated, "checked_out": checked_out, "capacity": capacity}
+
+        if saturated:
+            # A checkout would only queue behind the requests holding the pool
+            checks["database"] = {"ok": False, "error": "pool saturated"}
+            revisions = None
+        else:
+            checks["database"], revisions = self._check_database(engine)
+
+        heads = self.heads
+        checks["migrations"] = {
+            "ok": revisions is not None and revisions == heads,
+            "expected": sorted(heads),
+            "current": sorted(revisions) if revisions is not None else None,
+        }
+        return {"ready": all(check["ok"] for check in checks.values()), "checks": checks}
+
+    def check(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._result is None or now >= self._expires:
+                self._result = self._check()
+                self._expires = now + self.app.config['READYZ_CACHE_SECONDS']
+            return self._result
+
+
+readiness = Readiness()
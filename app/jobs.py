@@ -0,0 +1,234 @@
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from sqlalchemy import and_, delete, func, or_, select, update
+
+from . import db
+from .changes import log_changes
+from .models import ArchivedIssue, ArchivedIssueTag, Issue, IssueTag, Job, Priority, Status, Tag
+
+
+class JobKind:
+    """A registered job: `step(params, checkpoint, chunk_size)` does one chunk of
+    work and returns (new checkpoint, rows processed, finished). The runner
+    commits each chunk together with its checkpoint, so a job that dies
+    mid-way resumes after the last committed chunk."""
+
+    def __init__(self, step, validate=None, total=None):
+        self.step = step
+        self.validate = validate
+        self.total = total
+
+
+KINDS = {}
+
+
+def job_kind(name, validate=None, total=None):
+    def decorator(step):
+        KINDS[name] = JobKind(step, validate, total)
+        return step
+    return decorator
+
+
+# --- reassign_issues: move every issue off a status or priority -------------
+
+REASSIGN_TARGETS = {"status": (Status, "status_id"), "priority": (Priority, "priority_id")}
+
+
+def _validate_reassign(params):
+    if params.get("field") not in REASSIGN_TARGETS:
+        return "field must be 'status' or 'priority'."
+    model, _ = REASSIGN_TARGETS[params["field"]]
+    try:
+        source, target = int(params["from_id"]), int(params["to_id"])
+    except (KeyError, TypeError, ValueError):
+        return "from_id and to_id must be integers."
+    if source == target:
+        return "from_id and to_id must differ."
+    if db.session.get(model, source) is None or db.session.get(model, target) is None:
+        return f"Unknown {params['field']}."
+    return None
+
+
+def _count_reassign(params):
+    _, column = REASSIGN_TARGETS[params["field"]]
+    return sum(
+        db.session.execute(select(func.count()).where(getattr(model, column) == int(params["from_id"]))).scalar()
+        for model in (Issue, ArchivedIssue)
+    )
+
+
+@job_kind("reassign_issues", _validate_reassign, _count_reassign)
+def reassign_issues_step(params, checkpoint, chunk_size):
+    """Hot issues first, then archived ones; with delete_after the old
+    status/priority is deleted once nothing refers to it any more."""
+    model_cls, column = REASSIGN_TARGETS[params["field"]]
+    source, target = int(params["from_id"]), int(params["to_id"])
+    checkpoint = checkpoint or {}
+    phase, last_id = checkpoint.get("phase", 0), checkpoint.get("last_id")
+    if phase < 2:
+        model = (Issue, ArchivedIssue)[phase]
+        q = select(model.id).where(getattr(model, column) == source)
+        if last_id is not None:
+            q = q.where(model.id > last_id)
+        ids = db.session.execute(q.order_by(model.id).limit(chunk_size)).scalars().all()
+        if not ids:
+            # One more pass from the start catches rows moved onto the source
+            # behind the checkpoint; the phase ends on an empty full pass
+            return {"phase": phase if last_id is not None else phase + 1}, 0, False
+        db.session.execute(update(model).where(model.id.in_(ids)).values({column: target}))
+        if model is Issue:
+            log_changes(db.session, [(("issue", issue_id, issue_id), "upsert") for issue_id in ids])
+        else:
+            # Not in the change feed, but include_archived pages show them
+            db.session.info['issues_written'] = True
+        return {"phase": phase, "last_id": ids[-1]}, len(ids), False
+    if params.get("delete_after"):
+        db.session.execute(delete(model_cls).where(model_cls.id == source))
+    return {"phase": phase}, 0, True
+
+
+# --- delete_tag: unlink a heavily used tag in chunks, then delete it ---------
+
+def _validate_delete_tag(params):
+    try:
+        tag_id = int(params["tag_id"])
+    except (KeyError, TypeError, ValueError):
+        return "tag_id must be an integer."
+    if db.session.get(Tag, tag_id) is None:
+        return "Unknown tag."
+    return None
+
+
+def _count_delete_tag(params):
+    return db.session.execute(select(func.count()).where(IssueTag.tag_id == int(params["tag_id"]))).scalar()
+
+
+@job_kind("delete_tag", _validate_delete_tag, _count_delete_tag)
+def delete_tag_step(params, checkpoint, chunk_size):
+    tag_id = int(params["tag_id"])
+    last_issue_id = (checkpoint or {}).get("last_issue_id")
+    q = select(IssueTag.issue_id).where(IssueTag.tag_id == tag_id)
+    if last_issue_id is not None:
+        q = q.where(IssueTag.issue_id > last_issue_id)
+    issue_ids = db.session.execute(q.order_by(IssueTag.issue_id).limit(chunk_size)).scalars().all()
+    if issue_ids:
+        db.session.execute(delete(IssueTag).where(IssueTag.tag_id == tag_id, IssueTag.issue_id.in_(issue_ids)))
+        log_changes(db.session, [(("issue", issue_id, issue_id), "upsert") for issue_id in issue_ids])
+        return {"last_issue_id": issue_ids[-1]}, len(issue_ids), False
+    if last_issue_id is not None:
+        # Links added behind the checkpoint meanwhile: finish with a full pass
+        return {}, 0, False
+    # Archived links are not in the change feed; the FK cascade would take them too
+    db.session.execute(delete(ArchivedIssueTag).where(ArchivedIssueTag.tag_id == tag_id))
+    db.session.execute(delete(Tag).where(Tag.id == tag_id))
+    db.session.info['issues_written'] = True
+    return checkpoint, 0, True
+
+
+# --- runner ---------------------------------------------------------------------
+
+def enqueue(kind, params, user_id=None):
+    """Validate and queue a job. Returns (job, error message)."""
+    spec = KINDS.get(kind)
+    if spec is None:
+        return None, f"Unknown job kind '{kind}'."
+    error = spec.validate(params) if spec.validate else None
+    if error:
+        return None, error
+    job = Job(kind=kind, params=params, status="queued", processed=0, attempts=0, created_by=user_id,
+              total=spec.total(params) if spec.total else None)
+    db.session.add(job)
+    db.session.commit()
+    return job, None
+
+
+def claim_job(stale_after):
+    """Take the oldest queued job, or a running one whose worker stopped
+    heartbeating (it crashed), and mark it running."""
+    now = datetime.now(timezone.utc)
+    job = db.session.execute(
+        select(Job)
+        .where(or_(Job.status == "queued",
+                   and_(Job.status == "running", Job.heartbeat_at < now - timedelta(seconds=stale_after))))
+        .order_by(Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).scalar()
+    if job is None:
+        db.session.rollback()
+        return None
+    job.status = "running"
+    job.attempts += 1
+    job.started_at = job.started_at or now
+    job.heartbeat_at = now
+    db.session.commit()
+    return job
+
+
+def run_job(job, chunk_size, max_attempts):
+    spec = KINDS[job.kind]
+    while True:
+        try:
+            checkpoint, processed, finished = spec.step(job.params, job.checkpoint, chunk_size)
+            now = datetime.now(timezone.utc)
+            job.checkpoint = checkpoint
+            job.processed += processed
+            job.heartbeat_at = now
+            if finished:
+                job.status = "done"
+                job.finished_at = now
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            job = db.session.get(Job, job.id)
+            job.error = traceback.format_exc(limit=5)
+            # Retried from the last committed checkpoint until it runs out of attempts
+            job.status = "failed" if job.attempts >= max_attempts else "queued"
+            if job.status == "failed":
+                job.finished_at = datetime.now(timezone.utc)
+            db.session.commit()
+            return job
+        if finished:
+            return job
+
+
+def work(app, once, stop):
+    config = app.config
+    while not stop.is_set():
+        with app.app_context():
+            job = claim_job(config["JOB_STALE_SECONDS"])
+            if job is not None:
+                job = run_job(job, config["JOB_CHUNK_SIZE"], config["JOB_MAX_ATTEMPTS"])
+                click.echo(f"[{threading.current_thread().name}] job {job.id} ({job.kind}): {job.status}, "
+                           f"{job.processed} processed")
+                continue
+        if once:
+            return
+        stop.wait(config["JOB_POLL_SECONDS"])
+
+
+@click.command('run-jobs')
+@click.option('--threads', type=int, default=1, help='Jobs to run concurrently.')
+@click.option('--once', is_flag=True, help='Exit when the queue is empty instead of polling.')
+def run_jobs_command(threads, once):
+    """Run queued background jobs (start under a process manager)."""
+    app = current_app._get_current_object()
+    stop = threading.Event()
+    name = f"{socket.gethostname()}:{os.getpid()}"
+    workers = [threading.Thread(target=work, args=(app, once, stop), name=f"{name}/{i}", daemon=True)
+               for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    try:
+        while any(worker.is_alive() for worker in workers):
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        # The chunk in flight is rolled back; the job is picked up again once stale
+        stop.set()
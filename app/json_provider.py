@@ -0,0 +1,90 @@
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+from .negotiation import msgpack, msgpack_response, response_format
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib encoder is the fallback
+    orjson = None
+
+
+def _default(obj):
+    # Flask's default turns dates into HTTP dates; the API has always sent ISO 8601.
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return DefaultJSONProvider.default(obj)
+
+
+def _negotiate(provider, args, kwargs, json_response):
+    """jsonify() goes through the provider's response(), so this is where every
+    view's payload is encoded as msgpack instead when the client asks for it."""
+    if response_format() == "msgpack":
+        return msgpack_response(provider._prepare_response_obj(args, kwargs))
+    response = json_response(*args, **kwargs)
+    if msgpack is not None:
+        response.vary.add("Accept")
+    return response
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """The stdlib encoder, with datetimes serialized as ISO 8601 strings."""
+
+    name = "stdlib"
+    default = staticmethod(_default)
+
+    def response(self, *args, **kwargs):
+        return _negotiate(self, args, kwargs, super().response)
+
+
+class OrjsonJSONProvider(DefaultJSONProvider):
+    """orjson-backed provider that writes response bodies as bytes."""
+
+    name = "orjson"
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if not self._compact:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    @property
+    def _compact(self):
+        if self.compact is None:
+            return not self._app.debug
+        return self.compact
+
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=_default, option=self._options())
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def _json_response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+    def response(self, *args, **kwargs):
+        return _negotiate(self, args, kwargs, self._json_response)
+
+
+PROVIDERS = {
+    "stdlib": StdlibJSONProvider,
+    "orjson": OrjsonJSONProvider,
+}
+
+
+def select_json_provider(app):
+    """Pick the JSON provider named by JSON_PROVIDER; "auto" prefers orjson when installed."""
+    choice = app.config.get("JSON_PROVIDER", "auto")
+    if choice == "auto":
+        choice = "orjson" if orjson is not None else "stdlib"
+    if choice == "orjson" and orjson is None:
+        raise RuntimeError("JSON_PROVIDER=orjson but orjson is not installed")
+    return PROVIDERS[choice](app)
@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
 
 from . import db
-from flask_bcrypt import Bcrypt
+from .txid import current_txid
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -10,20 +10,37 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False, server_default='')
     role = db.Column(db.String(20), nullable=False, default='user')
+    # Refresh tokens issued before this (the last password change, whole seconds like a token's iat) are revoked
+    tokens_not_before = db.Column(db.DateTime, nullable=True)
     issues = db.relationship('Issue', back_populates='author', foreign_keys='Issue.author_id', cascade='all, delete-orphan')
     comments = db.relationship('Comment', back_populates='author', cascade='all, delete-orphan')
 
     def set_password(self, raw_password):
+        # Imported on first use; only register, login and password changes need bcrypt
+        from flask_bcrypt import Bcrypt
         bcrypt = Bcrypt()
         self.password_hash = bcrypt.generate_password_hash(raw_password).decode('utf-8')
 
     def check_password(self, raw_password):
+        from flask_bcrypt import Bcrypt
         bcrypt = Bcrypt()
         return bcrypt.check_password_hash(self.password_hash, raw_password)
 
+class Project(db.Model):
+    """Workspace that issues belong to; id 1 is the Default project the migration created."""
+    __tablename__ = 'projects'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
 class Issue(db.Model):
+    # Optionally hash-partitioned on project_id in Postgres (flask
+    # partition-issues); the primary key then is (id, project_id) but id
+    # alone is unique and identifies a row here.
     __tablename__ = 'issues'
     id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    project    = db.relationship('Project')
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text, nullable=True)
     status_id   = db.Column(db.Integer, db.ForeignKey('statuses.id'), nullable=False)
@@ -39,10 +56,17 @@ class Issue(db.Model):
 
 class Tag(db.Model):
     __tablename__ = 'tags'
+    # Names are unique among the shared tags (NULL project, indexed as 0) and
+    # within each project
+    __table_args__ = (
+        db.Index('uq_tags_project_id_name', db.text('coalesce(project_id, 0)'), 'name', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False, unique=True)
+    name = db.Column(db.String(100), nullable=False)
     color = db.Column(db.String(20))
     display_order = db.Column(db.Integer, nullable=False, default=0)
+    # NULL for tags shared by every project
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id', ondelete='CASCADE'), nullable=True, index=True)
     issues = db.relationship('Issue', secondary='issues_tags', back_populates='tags')
 
 class Status(db.Model):
@@ -63,6 +87,8 @@ class IssueTag(db.Model):
     tag_id = db.Column(db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True)
 
 class Comment(db.Model):
+    # Range-partitioned by month on created_at in Postgres; the table's primary
+    # key is (id, created_at) but id alone is unique and identifies a row here.
     __tablename__ = 'comments'
     id = db.Column(db.Integer, primary_key=True)
     issue_id = db.Column(db.Integer, db.ForeignKey('issues.id', ondelete='CASCADE'))
@@ -76,4 +102,92 @@ class Comment(db.Model):
     )
     author_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'))
     author = db.relationship('User', back_populates='comments')
-    issue = db.relationship('Issue', back_populates='comments')
\ No newline at end of file
+    issue = db.relationship('Issue', back_populates='comments')
+
+class Change(db.Model):
+    """Append-only log of issue and comment writes, read in (txid, id) order.
+
+    Ids are handed out at flush time, so a lower id can commit after a higher
+    one; the writing transaction's id below the commit horizon is what makes a
+    position in the log final, so it doubles as the sync token.
+    """
+    __tablename__ = 'changes'
+    __table_args__ = (db.Index('ix_changes_txid_id', 'txid', 'id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    txid = db.Column(db.BigInteger, nullable=False, default=current_txid())
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    issue_id = db.Column(db.Integer, nullable=True)
+    op = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+class ChangePrune(db.Model):
+    """One row per `flask prune-changes` run; tokens below the highest txid must resync."""
+    __tablename__ = 'change_prunes'
+    id = db.Column(db.Integer, primary_key=True)
+    txid = db.Column(db.BigInteger, nullable=False)
+    removed = db.Column(db.Integer, nullable=False, default=0)
+    pruned_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
+class ArchivedIssue(db.Model):
+    """Closed issues moved out of the hot `issues` table by the archive job."""
+    __tablename__ = 'archived_issues'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    status_id   = db.Column(db.Integer, db.ForeignKey('statuses.id'), nullable=False)
+    status      = db.relationship('Status')
+    priority_id = db.Column(db.Integer, db.ForeignKey('priorities.id'), nullable=False)
+    priority    = db.relationship('Priority')
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    author_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    author    = db.relationship('User', viewonly=True)
+    tags = db.relationship('Tag', secondary='archived_issues_tags', viewonly=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+class ArchivedIssueTag(db.Model):
+    __tablename__ = 'archived_issues_tags'
+    issue_id = db.Column(db.Integer, db.ForeignKey('archived_issues.id', ondelete='CASCADE'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True)
+
+class ArchivedComment(db.Model):
+    __tablename__ = 'archived_comments'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    issue_id = db.Column(db.Integer, db.ForeignKey('archived_issues.id', ondelete='CASCADE'), index=True)
+    content = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'))
+    author = db.relationship('User', viewonly=True)
+    issue = db.relationship('ArchivedIssue', viewonly=True)
+
+class Job(db.Model):
+    """Long-running admin operation, executed in checkpointed chunks by `flask run-jobs`."""
+    __tablename__ = 'jobs'
+    __table_args__ = (db.Index('ix_jobs_status_id', 'status', 'id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    checkpoint = db.Column(db.JSON, nullable=True)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+class RevokedToken(db.Model):
+    """Refresh tokens that were rotated or logged out; rows can go once expires_at passes."""
+    __tablename__ = 'revoked_tokens'
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -0,0 +1,84 @@
+from datetime import date, datetime, timezone
+
+from flask import Request, current_app, has_request_context, request
+from werkzeug.exceptions import BadRequest
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, without it every body stays JSON
+    msgpack = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, "application/x-msgpack")
+
+MIMETYPES = {"json": JSON_MIMETYPE, "msgpack": MSGPACK_MIMETYPE}
+
+
+def response_format():
+    """"msgpack" when the request's Accept header prefers it (and msgpack is
+    installed), otherwise "json", which also wins ties such as */*."""
+    if msgpack is None or not has_request_context():
+        return "json"
+    best = request.accept_mimetypes.best_match([JSON_MIMETYPE, *MSGPACK_MIMETYPES], default=JSON_MIMETYPE)
+    return "msgpack" if best in MSGPACK_MIMETYPES else "json"
+
+
+def _msgpack_default(obj):
+    # Timestamps go out as the msgpack timestamp extension; the naive
+    # datetimes stored in the database are UTC
+    if isinstance(obj, datetime):
+        return msgpack.Timestamp.from_datetime(obj if obj.tzinfo else obj.replace(tzinfo=timezone.utc))
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+def packb(obj):
+    return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+
+
+def encode_body(obj, fmt=None):
+    """Serialize a payload in the negotiated format, for code that builds or
+    caches bodies itself instead of going through jsonify."""
+    if (fmt or response_format()) == "msgpack":
+        return packb(obj)
+    return current_app.json.dumps(obj)
+
+
+def error_response(error):
+    """Error handler for abort(), get_or_404() and other HTTP errors: the
+    API's {"error": ...} body in the negotiated format instead of
+    Werkzeug's HTML page."""
+    fmt = response_format()
+    response = current_app.response_class(encode_body({"error": error.description}, fmt),
+                                          status=error.code, mimetype=MIMETYPES[fmt])
+    # Keep headers such as Allow on a 405, but not the HTML content type
+    for key, value in error.get_headers():
+        if key.lower() != "content-type":
+            response.headers.add(key, value)
+    if msgpack is not None:
+        response.vary.add("Accept")
+    return response
+
+
+def msgpack_response(obj):
+    response = current_app.response_class(packb(obj), mimetype=MSGPACK_MIMETYPE)
+    response.vary.add("Accept")
+    return response
+
+
+class NegotiatingRequest(Request):
+    """Request whose get_json() also decodes application/msgpack bodies, so
+    views read either format through the same call."""
+
+    def get_json(self, force=False, silent=False, cache=True):
+        if self.mimetype not in MSGPACK_MIMETYPES or msgpack is None:
+            return super().get_json(force=force, silent=silent, cache=cache)
+        try:
+            # timestamp=3: msgpack timestamps arrive as aware datetimes
+            return msgpack.unpackb(self.get_data(cache=cache), timestamp=3)
+        except Exception:
+            if silent:
+                return None
+            raise BadRequest("Failed to decode msgpack body.")
@@ -0,0 +1,228 @@
+from datetime import date
+
+import click
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from . import db
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _partition_name(month):
+    return f"comments_{month:%Y_%m}"
+
+
+def comment_partitions():
+    """Existing monthly partitions of comments as {first day of month: table name}."""
+    rows = db.session.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'comments' AND child.relname ~ '^comments_[0-9]{4}_[0-9]{2}$'
+    """)).scalars()
+    return {date(int(name[9:13]), int(name[14:16]), 1): name for name in rows}
+
+
+def ensure_future_partitions(months_ahead, months_back=0):
+    """Create the monthly partitions from `months_back` months ago up to `months_ahead` months out.
+
+    Returns (created, skipped): the new partitions' names and (name, error)
+    for the months that could not be created. Rows that already landed in
+    the default partition for a month are moved into its new partition, and
+    each month runs in its own savepoint so one failure does not roll back
+    the others.
+    """
+    existing = comment_partitions()
+    this_month = date.today().replace(day=1)
+    created, skipped = [], []
+    for offset in range(-months_back, months_ahead + 1):
+        month = _add_months(this_month, offset)
+        if month in existing:
+            continue
+        name = _partition_name(month)
+        bounds = {"start": month, "end": _add_months(month, 1)}
+        try:
+            with db.session.begin_nested():
+                # A partition can't be attached while the default one holds
+                # rows in its range, so build it standalone and move them over
+                db.session.execute(text(f"CREATE TABLE {name} (LIKE comments INCLUDING DEFAULTS)"))
+                db.session.execute(text(f"""
+                    WITH moved AS (
+                        DELETE FROM comments_default
+                        WHERE created_at >= :start AND created_at < :end
+                        RETURNING id, issue_id, content, created_at, updated_at, author_id
+                    )
+                    INSERT INTO {name} (id, issue_id, content, created_at, updated_at, author_id)
+                    SELECT id, issue_id, content, created_at, updated_at, author_id FROM moved
+                """), bounds)
+                db.session.execute(text(
+                    f"ALTER TABLE comments ATTACH PARTITION {name} "
+                    f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')"
+                ))
+        except DBAPIError as exc:
+            skipped.append((name, str(exc.orig).strip()))
+            continue
+        existing[month] = name
+        created.append(name)
+    return created, skipped
+
+
+def index_partitions(brin_after_months):
+    """Give recent partitions a btree on updated_at and swap it for BRIN indexes on older ones.
+
+    Old months are append-only in practice, so their rows are physically
+    ordered by time and a BRIN index prunes nearly as well at a tiny size.
+    """
+    cutoff = _add_months(date.today().replace(day=1), -brin_after_months)
+    changed = []
+    for month, name in sorted(comment_partitions().items()):
+        if month < cutoff:
+            db.session.execute(text(f"CREATE INDEX IF NOT EXISTS {name}_created_at_brin ON {name} USING brin (created_at)"))
+            db.session.execute(text(f"CREATE INDEX IF NOT EXISTS {name}_updated_at_brin ON {name} USING brin (updated_at)"))
+            db.session.execute(text(f"DROP INDEX IF EXISTS {name}_updated_at_idx"))
+            changed.append(f"{name}: brin")
+        else:
+            db.session.execute(text(f"CREATE INDEX IF NOT EXISTS {name}_updated_at_idx ON {name} (updated_at)"))
+    return changed
+
+
+@click.command('partition-comments')
+@click.option('--months-ahead', type=int, default=None, help='Future months to create (default: COMMENT_PARTITION_MONTHS_AHEAD).')
+@click.option('--brin-after', type=int, default=None, help='Age in months after which partitions get BRIN indexes (default: COMMENT_BRIN_AFTER_MONTHS).')
+def partition_comments_command(months_ahead, brin_after):
+    """Create upcoming comment partitions and re-index old ones; run it from cron."""
+    if months_ahead is None:
+        months_ahead = current_app.config['COMMENT_PARTITION_MONTHS_AHEAD']
+    if brin_after is None:
+        brin_after = current_app.config['COMMENT_BRIN_AFTER_MONTHS']
+    created, skipped = ensure_future_partitions(months_ahead)
+    changed = index_partitions(brin_after)
+    db.session.commit()
+    for name in created:
+        click.echo(f"Created partition {name}")
+    for name, error in skipped:
+        click.echo(f"Skipped partition {name}: {error}", err=True)
+    for line in changed:
+        click.echo(f"Indexed {line}")
+
+
+# --- issues: optional hash partitioning on project_id ---------------------------
+
+# Recreated on the rebuilt table: (name, definition)
+ISSUE_FOREIGN_KEYS = [
+    ('issues_status_id_fkey', 'FOREIGN KEY (status_id) REFERENCES statuses (id)'),
+    ('issues_priority_id_fkey', 'FOREIGN KEY (priority_id) REFERENCES priorities (id)'),
+    ('issues_author_id_fkey', 'FOREIGN KEY (author_id) REFERENCES users (id) ON DELETE CASCADE'),
+    ('issues_project_id_fkey', 'FOREIGN KEY (project_id) REFERENCES projects (id)'),
+]
+ISSUE_INDEXES = [
+    ('ix_issues_updated_at', 'updated_at'),
+    ('ix_issues_status_id_updated_at', 'status_id, updated_at'),
+    ('ix_issues_priority_id_updated_at', 'priority_id, updated_at'),
+    ('ix_issues_author_id_updated_at', 'author_id, updated_at'),
+    ('ix_issues_project_id_updated_at', 'project_id, updated_at'),
+    ('ix_issues_project_id_status_id_updated_at', 'project_id, status_id, updated_at'),
+    ('ix_issues_project_id_priority_id_updated_at', 'project_id, priority_id, updated_at'),
+]
+# Foreign keys on issues.id, which a table partitioned on project_id cannot
+# back; recreated under these names when partitioning is undone
+ISSUE_REFERENCES = [
+    ('comments', 'comments_issue_id_fkey'),
+    ('issues_tags', 'issues_tags_issue_id_fkey'),
+]
+
+
+def issues_partitioned():
+    return db.session.execute(text("SELECT relkind = 'p' FROM pg_class WHERE oid = 'issues'::regclass")).scalar()
+
+
+def _rebuild_issues(create_table, primary_key, partitions=()):
+    """Copy issues into a freshly created table and put its keys and indexes back."""
+    db.session.execute(text("ALTER TABLE issues RENAME TO issues_old"))
+    db.session.execute(text(create_table))
+    for name, bounds in partitions:
+        db.session.execute(text(f"CREATE TABLE {name} PARTITION OF issues {bounds}"))
+    db.session.execute(text("INSERT INTO issues SELECT * FROM issues_old"))
+    db.session.execute(text("ALTER SEQUENCE issues_id_seq OWNED BY issues.id"))
+    # Dropping the old table frees the constraint and index names for reuse
+    db.session.execute(text("DROP TABLE issues_old"))
+    db.session.execute(text(f"ALTER TABLE issues ADD CONSTRAINT issues_pkey PRIMARY KEY ({primary_key})"))
+    for name, definition in ISSUE_FOREIGN_KEYS:
+        db.session.execute(text(f"ALTER TABLE issues ADD CONSTRAINT {name} {definition}"))
+    for name, columns in ISSUE_INDEXES:
+        db.session.execute(text(f"CREATE INDEX {name} ON issues ({columns})"))
+
+
+def partition_issues(partitions):
+    """Rebuild issues as `partitions` hash partitions on project_id. Returns False if it already is.
+
+    The comments and issues_tags foreign keys on issues.id cannot stay, so a
+    trigger takes over their ON DELETE CASCADE: whichever way an issue goes
+    (the delete route, a user delete cascading to their issues), its comments
+    and tag links go with it.
+    """
+    if issues_partitioned():
+        return False
+    # Looked up rather than named: the comments partitioning migration left its key as comments_issue_id_fkey1
+    references = db.session.execute(text("""
+        SELECT conrelid::regclass::text, conname FROM pg_constraint
+        WHERE contype = 'f' AND confrelid = 'issues'::regclass AND conparentid = 0
+    """)).all()
+    for table, name in references:
+        db.session.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+    _rebuild_issues(
+        "CREATE TABLE issues (LIKE issues_old INCLUDING DEFAULTS INCLUDING STORAGE) PARTITION BY HASH (project_id)",
+        "id, project_id",
+        [(f"issues_p{remainder}", f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})")
+         for remainder in range(partitions)],
+    )
+    db.session.execute(text("""
+        CREATE OR REPLACE FUNCTION issues_delete_dependents() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM comments WHERE issue_id = OLD.id;
+            DELETE FROM issues_tags WHERE issue_id = OLD.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """))
+    db.session.execute(text(
+        "CREATE TRIGGER issues_delete_dependents AFTER DELETE ON issues "
+        "FOR EACH ROW EXECUTE FUNCTION issues_delete_dependents()"
+    ))
+    return True
+
+
+def unpartition_issues():
+    """Turn issues back into a plain table with its foreign keys. Returns False if it is not partitioned."""
+    if not issues_partitioned():
+        return False
+    _rebuild_issues("CREATE TABLE issues (LIKE issues_old INCLUDING DEFAULTS INCLUDING STORAGE)", "id")
+    db.session.execute(text("DROP FUNCTION IF EXISTS issues_delete_dependents()"))
+    for table, name in ISSUE_REFERENCES:
+        db.session.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY (issue_id) REFERENCES issues (id) ON DELETE CASCADE"
+        ))
+    return True
+
+
+@click.command('partition-issues')
+@click.option('--partitions', type=click.IntRange(min=2), default=None, help='Hash partitions on project_id.')
+@click.option('--undo', is_flag=True, help='Turn issues back into a plain table.')
+def partition_issues_command(partitions, undo):
+    """Hash-partition issues by project_id (opt-in; locks issues while it copies)."""
+    if undo:
+        done = unpartition_issues()
+        message = "issues is a plain table again." if done else "issues is not partitioned."
+    else:
+        if partitions is None:
+            raise click.UsageError("--partitions is required.")
+        done = partition_issues(partitions)
+        message = f"issues now has {partitions} hash partitions on project_id." if done else "issues is already partitioned."
+    db.session.commit()
+    click.echo(message)
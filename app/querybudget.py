@@ -0,0 +1,101 @@
+import re
+from collections import Counter
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Expanded IN lists render one placeholder per value; collapse them so the
+# same query over a different number of ids still has the same shape
+_IN_LIST = re.compile(r"\((?:\s*%\(\w+\)s\s*,)*\s*%\(\w+\)s\s*\)|\((?:\s*\?\s*,)*\s*\?\s*\)")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(limit):
+    """Declare the most statements a view may run per request.
+
+    Put it directly below @main.route, above @jwt_required() and @coalesce,
+    so the attribute lands on the function Flask registers.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def statement_shape(statement):
+    return _IN_LIST.sub("(...)", " ".join(statement.split()))
+
+
+class QueryCounter:
+    """Counts the statements each request runs (QUERY_BUDGET_MODE=warn|raise).
+
+    After the view returns it checks the count against the view's
+    @query_budget and flags statement shapes executed QUERY_REPEAT_THRESHOLD
+    or more times with different parameters, the usual sign of a lazy load
+    inside a loop. "warn" logs and adds X-Query-Count; "raise" turns the
+    response into an error so a test run fails loudly. Off by default.
+    """
+
+    def __init__(self, app=None):
+        self._listening = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_BUDGET_MODE', 'off')
+        app.config.setdefault('QUERY_REPEAT_THRESHOLD', 3)
+        if app.config['QUERY_BUDGET_MODE'] not in ('warn', 'raise'):
+            return
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._record)
+            self._listening = True
+        app.before_request(self._start)
+        app.after_request(self._check)
+
+    @staticmethod
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if has_app_context():
+            log = g.get('query_log')
+            if log is not None:
+                log.append((statement, parameters))
+
+    @staticmethod
+    def _start():
+        g.query_log = []
+
+    def problems(self, log, budget):
+        problems = []
+        if budget is not None and len(log) > budget:
+            problems.append(f"{len(log)} statements, budget is {budget}")
+        shapes = Counter()
+        distinct = {}
+        for statement, parameters in log:
+            shape = statement_shape(statement)
+            shapes[shape] += 1
+            distinct.setdefault(shape, set()).add(repr(parameters))
+        threshold = current_app.config['QUERY_REPEAT_THRESHOLD']
+        for shape, count in shapes.items():
+            if count >= threshold and len(distinct[shape]) > 1:
+                problems.append(f"possible N+1: {count}x {shape[:200]}")
+        return problems
+
+    def _check(self, response):
+        log = g.pop('query_log', None)
+        if log is None:
+            return response
+        view = current_app.view_functions.get(request.endpoint)
+        problems = self.problems(log, getattr(view, 'query_budget', None))
+        response.headers['X-Query-Count'] = str(len(log))
+        if problems:
+            message = f"{request.method} {request.path}: " + "; ".join(problems)
+            if current_app.config['QUERY_BUDGET_MODE'] == 'raise':
+                raise QueryBudgetExceeded(message)
+            current_app.logger.warning(message)
+        return response
+
+
+query_counter = QueryCounter()
@@ -1,41 +1,363 @@
-from flask import Blueprint, jsonify, request
-from .models import Issue, Tag, User, Comment, Status, Priority
-from . import db, bcrypt, jwt
-from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required
+import queue
+import traceback
+from datetime import datetime, timezone
+from flask import Blueprint, Response, current_app, jsonify, request
+from .models import Issue, Tag, User, Comment, Status, Priority, ArchivedIssue, ArchivedComment, ArchivedIssueTag, IssueTag, Job, Project
+from .archive import delete_archived_issue, restore_issue
+from .changes import changes_since, log_changes
+from .events import broker, format_sse, matches
+from .cache import issue_cache, user_cache
+from .singleflight import coalesce
+from .touch import issue_touch
+from .tag_index import tag_index
+from .counting import count_rows, parse_count_mode
+from .health import readiness
+from .querybudget import query_budget
+from .jobs import enqueue
+from .batch import run_batch
+from .tokens import revocations
+from .negotiation import MIMETYPES, encode_body, msgpack, response_format
+from . import db, jwt
+from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt, get_jwt_identity, jwt_required
+from sqlalchemy import Integer, case, column, literal, or_, select, tuple_, union_all, update, values
+from sqlalchemy.orm import defer, joinedload, selectinload
 
 main = Blueprint("main", __name__)
 
-def serialize_issue(issue):
-    comment_count = Comment.query.filter_by(issue_id=issue.id).count()
-    return {
-        "id": issue.id,
-        "title": issue.title,
-        "description": issue.description,
-        "status": {"id": issue.status.id, "name": issue.status.name} if issue.status else None,
-        "priority": {"id": issue.priority.id, "name": issue.priority.name} if issue.priority else None,
-        "author": {"id": issue.author.id, "name": issue.author.name} if issue.author else None,
-        "tags": [{"id": tag.id, "name": tag.name, "color": tag.color} for tag in issue.tags],
-        "created_at": issue.created_at.isoformat() if issue.created_at else None,
-        "updated_at": issue.updated_at.isoformat() if issue.updated_at else None,
-        "comment_count": comment_count
-    }
+ISSUE_FIELDS = {
+    "id": lambda issue: issue.id,
+    "project_id": lambda issue: issue.project_id,
+    "title": lambda issue: issue.title,
+    "description": lambda issue: issue.description,
+    "status": lambda issue: {"id": issue.status.id, "name": issue.status.name} if issue.status else None,
+    "priority": lambda issue: {"id": issue.priority.id, "name": issue.priority.name} if issue.priority else None,
+    "author": lambda issue: {"id": issue.author.id, "name": issue.author.name} if issue.author else None,
+    "tags": lambda issue: [{"id": tag.id, "name": tag.name, "color": tag.color} for tag in issue.tags],
+    "created_at": lambda issue: issue.created_at,
+    "updated_at": lambda issue: issue.updated_at,
+}
+
+COMMENT_FIELDS = {
+    "id": lambda comment: comment.id,
+    "content": lambda comment: comment.content,
+    "created_at": lambda comment: comment.created_at,
+    "updated_at": lambda comment: comment.updated_at,
+    "author": lambda comment: {"id": comment.author.id, "name": comment.author.name} if comment.author else None,
+    "issue": lambda comment: {"id": comment.issue.id, "title": comment.issue.title} if comment.issue else None,
+}
+
+def parse_fields(allowed):
+    """Return the set of fields requested with ?fields=a,b or None for all of them."""
+    raw = request.args.get("fields")
+    if not raw:
+        return None
+    fields = {name.strip() for name in raw.split(",") if name.strip() in allowed}
+    fields.add("id")
+    return fields
+
+def parse_int_arg(name):
+    """Integer query param, or None when it is missing or malformed."""
+    try:
+        return int(request.args[name]) if request.args.get(name) else None
+    except (TypeError, ValueError):
+        return None
+
+def parse_int_list_arg(name):
+    raw = request.args.get(name)
+    if not raw:
+        return None
+    try:
+        return [int(t) for t in raw.split(",") if t.strip()]
+    except ValueError:
+        return None
+
+def filter_issues(q, model, status_id=None, priority_id=None, author_id=None, tags_list=None,
+                  tags_all=None, tags_not=None, project_id=None):
+    """Apply the get_issues filters to a query or select over Issue or ArchivedIssue."""
+    if project_id is not None:
+        q = q.filter(model.project_id == project_id)
+    if status_id is not None:
+        q = q.filter(model.status_id == status_id)
+    if priority_id is not None:
+        q = q.filter(model.priority_id == priority_id)
+    if author_id is not None:
+        q = q.filter(model.author_id == author_id)
+    if tags_list:
+        q = q.filter(tagged(model, tags_list))
+    for tag_id in tags_all or ():
+        q = q.filter(tagged(model, [tag_id]))
+    if tags_not:
+        q = q.filter(~tagged(model, tags_not))
+    return q
+
+def tagged(model, tag_ids):
+    """EXISTS over the issue's tag links; the tags table itself is not needed."""
+    link = IssueTag if model is Issue else ArchivedIssueTag
+    return select(link.issue_id).where(link.issue_id == model.id, link.tag_id.in_(tag_ids)).exists()
+
+def filter_hot_issues(q, **filters):
+    """filter_issues for the hot table, with tag filters answered by the tag index when it can."""
+    if tag_index.enabled and any(filters.get(key) for key in ("tags_list", "tags_all", "tags_not")):
+        candidates = tag_index.candidates(filters.get("tags_list"), filters.get("tags_all"), filters.get("tags_not"))
+        if candidates is not None:
+            q = q.filter(Issue.id.in_(candidates))
+            filters = dict(filters, tags_list=None, tags_all=None, tags_not=None)
+    return filter_issues(q, Issue, **filters)
+
+def listed_in(project_id):
+    """Filter for the tags listed in `project_id`: its own and the shared ones
+    (only the shared ones for None)."""
+    return or_(Tag.project_id.is_(None), Tag.project_id == project_id)
+
+def tags_for_project(tag_ids, project_id):
+    """The given tags that issues in `project_id` may carry: its own and the shared ones."""
+    return Tag.query.filter(Tag.id.in_(tag_ids), listed_in(project_id)).all()
+
+def tag_name_taken(name, project_id, exclude_id=None):
+    """Whether a tag in `project_id` (None: shared) named `name` would clash with
+    a tag listed next to it: the project's own and the shared ones, or any
+    tag at all for a shared tag, which every project lists."""
+    q = Tag.query.filter(Tag.name == name)
+    if exclude_id is not None:
+        q = q.filter(Tag.id != exclude_id)
+    if project_id is not None:
+        q = q.filter(listed_in(project_id))
+    return db.session.query(q.exists()).scalar()
+
+def tag_count_query(filters):
+    """For an "any of these tags" filter on its own, the hot-list total can be
+    counted from the tag links (each belongs to a hot issue) without reading issues."""
+    if not filters.get("tags_list") or any(value for key, value in filters.items() if key != "tags_list"):
+        return None
+    return select(IssueTag.issue_id).where(IssueTag.tag_id.in_(filters["tags_list"])).distinct()
+
+FACETS = ("status", "priority", "tag")
+
+def issue_facets(names, include_archived=False, **filters):
+    """Issue counts per status, priority and/or tag under the get_issues filters."""
+    counts = {name: {} for name in names}
+    sources = [(Issue, IssueTag)] + ([(ArchivedIssue, ArchivedIssueTag)] if include_archived else [])
+    for model, link in sources:
+        columns = select(model.id, model.status_id, model.priority_id)
+        filtered = (filter_hot_issues(columns, **filters) if model is Issue else filter_issues(columns, model, **filters)).subquery()
+
+        grouped = [(name, filtered.c[f"{name}_id"]) for name in ("status", "priority") if name in names]
+        if len(grouped) == 2 and db.engine.dialect.name == "postgresql":
+            # Both facets in one scan; every row has exactly one of the two set
+            rows = db.session.execute(
+                select(filtered.c.status_id, filtered.c.priority_id, db.func.count())
+                .group_by(db.func.grouping_sets(tuple_(filtered.c.status_id), tuple_(filtered.c.priority_id)))
+            )
+            for status_id, priority_id, count in rows:
+                name, key = ("status", status_id) if priority_id is None else ("priority", priority_id)
+                counts[name][key] = counts[name].get(key, 0) + count
+        else:
+            for name, column in grouped:
+                for key, count in db.session.execute(select(column, db.func.count()).group_by(column)):
+                    counts[name][key] = counts[name].get(key, 0) + count
+
+        if "tag" in names:
+            only_tag_filters = all(filters.get(key) is None for key in ("status_id", "priority_id", "author_id", "project_id"))
+            if model is Issue and tag_index.enabled and only_tag_filters:
+                tag_counts = tag_index.tag_counts(filters.get("tags_list"), filters.get("tags_all"), filters.get("tags_not")).items()
+            else:
+                tag_counts = db.session.execute(
+                    select(link.tag_id, db.func.count())
+                    .where(link.issue_id.in_(select(filtered.c.id)))
+                    .group_by(link.tag_id)
+                )
+            for key, count in tag_counts:
+                counts["tag"][key] = counts["tag"].get(key, 0) + count
 
-def serialize_comment(comment):
     return {
-        "id": comment.id,
-        "content": comment.content,
-        "created_at": comment.created_at.isoformat() if comment.created_at else None,
-        "updated_at": comment.updated_at.isoformat() if comment.updated_at else None,
-        "author": {"id": comment.author.id, "name": comment.author.name} if comment.author else None,
-        "issue": {"id": comment.issue.id, "title": comment.issue.title} if comment.issue else None
+        name: [{"id": key, "count": count} for key, count in sorted(values.items(), key=lambda item: (-item[1], item[0]))]
+        for name, values in counts.items()
     }
 
+def id_list_key(ids):
+    return ",".join(map(str, sorted(set(ids)))) if ids else None
+
+def archived_issues_page(fields, skip, limit, count_mode="exact", **filters):
+    """Count and page over the hot and archived issues together."""
+    hot = filter_issues(select(Issue.id, Issue.updated_at, literal(False).label("archived")), Issue, **filters)
+    cold = filter_issues(select(ArchivedIssue.id, ArchivedIssue.updated_at, literal(True).label("archived")), ArchivedIssue, **filters)
+    total, count_mode = count_rows(union_all(hot, cold), count_mode)
+    both = union_all(hot, cold).subquery()
+    page = db.session.execute(select(both).order_by(both.c.updated_at.desc()).offset(skip).limit(limit)).all()
+
+    rows = {}
+    for model, archived in ((Issue, False), (ArchivedIssue, True)):
+        ids = [row.id for row in page if row.archived == archived]
+        if ids:
+            for issue in model.query.options(*issue_load_options(fields, model)).filter(model.id.in_(ids)):
+                rows[(archived, issue.id)] = issue
+    return total, count_mode, [rows[(row.archived, row.id)] for row in page if (row.archived, row.id) in rows]
+
+def apply_display_order(model, ids):
+    """Set display_order to each id's 1-based position in `ids` with a single UPDATE."""
+    table = model.__table__
+    positions = [(id, position) for position, id in enumerate(ids, 1)]
+    if db.engine.dialect.name == "postgresql":
+        ordering = values(column("id", Integer), column("position", Integer), name="ordering").data(positions)
+        stmt = update(table).where(table.c.id == ordering.c.id).values(display_order=ordering.c.position)
+    else:
+        stmt = update(table).where(table.c.id.in_(ids)).values(display_order=case(dict(positions), value=table.c.id))
+    db.session.execute(stmt)
+
+def reorder(model, fields, scope=None):
+    """Shared body of the PUT .../order routes: {"order": [every id, in the new order]}.
+
+    `scope` narrows "every id" to the rows one list shows, e.g. one project's tags.
+    """
+    user = User.query.get_or_404(int(get_jwt_identity()))
+    if user.role != 'admin':
+        return jsonify({'error': 'Forbidden'}), 403
+    ids = (request.get_json(silent=True) or {}).get('order')
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        return jsonify({'error': 'order must be a list of ids.'}), 400
+    if len(set(ids)) != len(ids):
+        return jsonify({'error': 'order contains duplicate ids.'}), 400
+    # Plain dicts, since the commit below expires the ORM rows
+    q = model.query if scope is None else model.query.filter(scope)
+    rows = {row.id: {name: getattr(row, name) for name in fields} for row in q.all()}
+    if set(ids) != set(rows):
+        return jsonify({
+            'error': 'order must list every id exactly once.',
+            'missing': sorted(set(rows) - set(ids)),
+            'unknown': sorted(set(ids) - set(rows)),
+        }), 400
+    apply_display_order(model, ids)
+    # A Core UPDATE, so the flush hook in cache.py doesn't see it
+    db.session.info['issues_written'] = True
+    db.session.commit()
+    return jsonify([dict(rows[id], display_order=position) for position, id in enumerate(ids, 1)])
+
+def cached_response(body, status):
+    """Response for a body cached in the negotiated format (the cache key includes it)."""
+    response = current_app.response_class(body, mimetype=MIMETYPES[response_format()])
+    if msgpack is not None:
+        response.vary.add("Accept")
+    response.headers["X-Cache"] = status
+    return response
+
+def wants(fields, name):
+    return fields is None or name in fields
+
+def issue_load_options(fields, model=Issue):
+    # Only load what the serializer is going to touch: unrequested relations
+    # are never joined and the description column is not fetched.
+    options = []
+    if not wants(fields, "description"):
+        options.append(defer(model.description))
+    if wants(fields, "status"):
+        options.append(joinedload(model.status))
+    if wants(fields, "priority"):
+        options.append(joinedload(model.priority))
+    if wants(fields, "author"):
+        options.append(joinedload(model.author))
+    if wants(fields, "tags"):
+        options.append(selectinload(model.tags))
+    return options
+
+def comment_load_options(fields, model=Comment):
+    options = []
+    if not wants(fields, "content"):
+        options.append(defer(model.content))
+    if wants(fields, "author"):
+        options.append(joinedload(model.author))
+    if wants(fields, "issue"):
+        parent = ArchivedIssue if model is ArchivedComment else Issue
+        options.append(joinedload(model.issue).load_only(parent.id, parent.title))
+    return options
+
+def comment_counts(issue_ids, model=Comment):
+    """Comment counts for a page of issues in one grouped query."""
+    if not issue_ids:
+        return {}
+    rows = (db.session.query(model.issue_id, db.func.count(model.id))
+            .filter(model.issue_id.in_(issue_ids))
+            .group_by(model.issue_id)
+            .all())
+    return dict(rows)
+
+def serialize_issue(issue, fields=None, comment_count=None):
+    archived = isinstance(issue, ArchivedIssue)
+    data = {name: get(issue) for name, get in ISSUE_FIELDS.items() if wants(fields, name)}
+    if wants(fields, "comment_count"):
+        if comment_count is None:
+            comment_count = comment_counts([issue.id], ArchivedComment if archived else Comment).get(issue.id, 0)
+        data["comment_count"] = comment_count
+    if archived:
+        data["archived"] = True
+    return data
+
+def serialize_issues(issues, fields=None):
+    counts = {}
+    if wants(fields, "comment_count"):
+        counts = comment_counts([issue.id for issue in issues if not isinstance(issue, ArchivedIssue)])
+        counts.update(comment_counts([issue.id for issue in issues if isinstance(issue, ArchivedIssue)], ArchivedComment))
+    return [serialize_issue(issue, fields, counts.get(issue.id, 0)) for issue in issues]
+
+def serialize_comment(comment, fields=None):
+    return {name: get(comment) for name, get in COMMENT_FIELDS.items() if wants(fields, name)}
+
+ISSUE_INCLUDES = ("comments", "author")
+
+def parse_includes(allowed):
+    raw = request.args.get("include") or ""
+    return {name.strip() for name in raw.split(",")} & set(allowed)
+
+def embedded_comments(issue, include, limit):
+    """Newest comments of one issue for include=comments, in a single query.
+
+    The per-comment "issue" object is dropped since the parent is right
+    there; comment authors are joined in only with include=author.
+    """
+    model = ArchivedComment if isinstance(issue, ArchivedIssue) else Comment
+    fields = set(COMMENT_FIELDS) - {"issue"}
+    if "author" not in include:
+        fields.discard("author")
+    comments = (model.query.options(*comment_load_options(fields, model))
+                .filter(model.issue_id == issue.id)
+                .order_by(model.updated_at.desc())
+                .limit(limit)
+                .all())
+    return [serialize_comment(comment, fields) for comment in comments]
+
 @main.route("/")
 def hello():
     return "Hello from Issue Tracker backend!"
 
-@main.route("/api/issues", methods=["GET"])
-def get_issues():
+@main.route("/healthz")
+def healthz():
+    # Liveness only: the process is up and serving; never touches the database
+    return jsonify({"status": "ok"}), 200
+
+@main.route("/readyz")
+def readyz():
+    result = readiness.check()
+    return jsonify(result), 200 if result["ready"] else 503
+
+@main.route("/api/batch", methods=["POST"])
+def batch():
+    """Several GETs in one round trip: {"requests": ["/api/statuses", {"path": "/api/issues?limit=5"}], "parallel": false}.
+
+    The Authorization header is passed on to every sub-request, which checks
+    it as usual; responses come back in request order.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get("requests")
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'requests must be a non-empty list.'}), 400
+    if len(items) > current_app.config['BATCH_MAX_REQUESTS']:
+        return jsonify({'error': f"At most {current_app.config['BATCH_MAX_REQUESTS']} requests per batch."}), 400
+    paths = [item.get("path") if isinstance(item, dict) else item for item in items]
+    if not all(isinstance(path, str) and path.startswith("/") for path in paths):
+        return jsonify({'error': 'Each request must be a path starting with "/".'}), 400
+    return run_batch(paths, parallel=bool(data.get("parallel")))
+
+def list_issues(project_id=None):
+    """The GET /api/issues response, optionally limited to one project."""
     try:
         # Parse query params
         try:
@@ -46,58 +368,198 @@ def get_issues():
             limit = int(request.args.get("limit", 5))
         except (TypeError, ValueError):
             limit = 5
-        status_id = request.args.get("status_id")
-        priority_id = request.args.get("priority_id")
-        author_id = request.args.get("author_id")
-        tags = request.args.get("tags")
-        tags_list = None
-        if tags:
-            try:
-                tags_list = [int(t) for t in tags.split(",") if t.strip()]
-            except Exception:
-                tags_list = None
+        status_id = parse_int_arg("status_id")
+        priority_id = parse_int_arg("priority_id")
+        author_id = parse_int_arg("author_id")
+        tags_list = parse_int_list_arg("tags")
+        tags_all = parse_int_list_arg("tags_all")
+        tags_not = parse_int_list_arg("tags_not")
+        fields = parse_fields(set(ISSUE_FIELDS) | {"comment_count"})
+        include_archived = request.args.get("include_archived") == "1"
+        facets = [name for name in (request.args.get("facets") or "").split(",") if name in FACETS]
+        count_mode = parse_count_mode()
 
-        # Build query
-        q = Issue.query
-        if status_id:
-            try:
-                q = q.filter(Issue.status_id == int(status_id))
-            except Exception:
-                pass
-        if priority_id:
-            try:
-                q = q.filter(Issue.priority_id == int(priority_id))
-            except Exception:
-                pass
-        if author_id:
-            try:
-                q = q.filter(Issue.author_id == int(author_id))
-            except Exception:
-                pass
-        if tags_list:
-            q = q.filter(Issue.tags.any(Tag.id.in_(tags_list)))
-        total = q.count()
-        items = q.order_by(Issue.updated_at.desc()).offset(skip).limit(limit).all()
+        cache_key = None
+        if issue_cache.enabled:
+            cache_key = issue_cache.key(
+                "issues", project_id=project_id, skip=skip, limit=limit, status_id=status_id, priority_id=priority_id,
+                author_id=author_id,
+                tags=id_list_key(tags_list), tags_all=id_list_key(tags_all), tags_not=id_list_key(tags_not),
+                fields=",".join(sorted(fields)) if fields else None,
+                include_archived=1 if include_archived else None,
+                facets=",".join(sorted(facets)) or None,
+                count=count_mode,
+                format=response_format()
+            )
+            body = issue_cache.get(cache_key)
+            if body is not None:
+                return cached_response(body, "HIT")
 
-        return jsonify({
+        filters = dict(project_id=project_id, status_id=status_id, priority_id=priority_id, author_id=author_id,
+                       tags_list=tags_list, tags_all=tags_all, tags_not=tags_not)
+        if include_archived:
+            total, count_mode, items = archived_issues_page(fields, skip, limit, count_mode, **filters)
+        else:
+            # Build query
+            q = filter_hot_issues(Issue.query, **filters)
+            count_q = tag_count_query(filters)
+            total, count_mode = count_rows(q if count_q is None else count_q, count_mode)
+            items = q.options(*issue_load_options(fields)).order_by(Issue.updated_at.desc()).offset(skip).limit(limit).all()
+
+        payload = {
             "total_count": total,
+            "count_mode": count_mode,
             "skip": skip,
             "limit": limit,
-            "data": [serialize_issue(issue) for issue in items]
-        })
+            "data": serialize_issues(items, fields)
+        }
+        if facets:
+            payload["facets"] = issue_facets(facets, include_archived, **filters)
+        if cache_key is None:
+            return jsonify(payload)
+        body = encode_body(payload)
+        issue_cache.set(cache_key, body)
+        return cached_response(body, "MISS")
     except Exception as e:
         print(f"Error in get_issues: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({"error": "Internal server error"}), 500
 
+@main.route("/api/issues", methods=["GET"])
+@query_budget(10)
+@coalesce
+def get_issues():
+    return list_issues()
+
+@main.route("/api/projects", methods=["GET"])
+@query_budget(1)
+def get_projects():
+    projects = Project.query.order_by(Project.name).all()
+    return jsonify([{"id": project.id, "name": project.name, "created_at": project.created_at} for project in projects])
+
+@main.route("/api/projects", methods=["POST"])
+@jwt_required()
+def create_project():
+    user = User.query.get_or_404(int(get_jwt_identity()))
+    if user.role != 'admin':
+        return jsonify({'error': 'Forbidden'}), 403
+    data = request.get_json() or {}
+    name = (data.get('name') or '').strip()
+    if not name:
+        return jsonify({'error': 'Name is required.'}), 400
+    if Project.query.filter_by(name=name).first():
+        return jsonify({'error': 'Project name already exists.'}), 400
+    project = Project(name=name)
+    db.session.add(project)
+    db.session.commit()
+    return jsonify({'id': project.id, 'name': project.name, 'created_at': project.created_at}), 201
+
+@main.route("/api/projects/<int:project_id>/issues", methods=["GET"])
+@query_budget(11)
+@coalesce
+def get_project_issues(project_id):
+    Project.query.get_or_404(project_id)
+    return list_issues(project_id)
+
+@main.route("/api/issues/cache", methods=["GET"])
+@jwt_required()
+def get_issue_cache_stats():
+    user = User.query.get_or_404(int(get_jwt_identity()))
+    if user.role != 'admin':
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify(issue_cache.stats())
+
+@main.route("/api/changes", methods=["GET"])
+@query_budget(8)
+def get_changes():
+    try:
+        since = int(request.args.get("since", 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "since must be an integer token."}), 400
+    try:
+        limit = min(int(request.args.get("limit", 100)), 1000)
+    except (TypeError, ValueError):
+        limit = 100
+
+    result = changes_since(since, limit)
+    if result is None:
+        # Pruned past the token: the log no longer goes back that far
+        return jsonify({"error": "Sync token too old; fetch the full state and start again from since=0.",
+                        "resync": True}), 410
+    entries, next_since, has_more = result
+
+    # Load the current state of everything that was upserted in bulk
+    issue_ids = [e.entity_id for e in entries if e.entity == "issue" and e.op == "upsert"]
+    comment_ids = [e.entity_id for e in entries if e.entity == "comment" and e.op == "upsert"]
+    issues = Issue.query.options(*issue_load_options(None)).filter(Issue.id.in_(issue_ids)).all() if issue_ids else []
+    comments = Comment.query.options(*comment_load_options(None)).filter(Comment.id.in_(comment_ids)).all() if comment_ids else []
+    rows = {("issue", issue.id): data for issue, data in zip(issues, serialize_issues(issues))}
+    rows.update({("comment", comment.id): serialize_comment(comment) for comment in comments})
+
+    changes = []
+    for entry in entries:
+        change = {"token": entry.txid, "type": entry.entity, "op": entry.op, "id": entry.entity_id, "issue_id": entry.issue_id}
+        if entry.op == "upsert":
+            data = rows.get((entry.entity, entry.entity_id))
+            if data is None:
+                # Deleted or archived after this page; its tombstone (archived comments
+                # get one too) follows in a later page
+                continue
+            change["data"] = data
+        changes.append(change)
+
+    return jsonify({
+        "since": since,
+        "next_since": next_since,
+        "has_more": has_more,
+        "changes": changes
+    })
+
+@main.route("/api/stream", methods=["GET"])
+def stream():
+    filters = {key: parse_int_arg(key) for key in ("issue_id", "status_id", "priority_id", "author_id")}
+    filters["tags"] = parse_int_list_arg("tags")
+
+    if current_app.config["EVENTS_PG_NOTIFY"]:
+        broker.ensure_listener(current_app._get_current_object())
+    heartbeat = current_app.config["SSE_HEARTBEAT_SECONDS"]
+    subscription = broker.subscribe()
+
+    # The generator never touches the database, so an idle subscriber holds
+    # no pooled connection, only its queue.
+    def generate():
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    evt = subscription.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if matches(evt, filters):
+                    yield format_sse(evt)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
 @main.route("/api/issues/<int:id>", methods=["PUT"])
 @jwt_required()
 def update_issue(id):
     user_id = int(get_jwt_identity())
     user = User.query.get_or_404(user_id)
     data = request.get_json()
-    issue = Issue.query.get_or_404(id)
+    issue = Issue.query.get(id)
+    if issue is None:
+        # Editing an archived issue (typically reopening it) moves it back first
+        archived = ArchivedIssue.query.get_or_404(id)
+        if user.role != 'admin' and archived.author_id != user_id:
+            return jsonify({'error': 'Forbidden'}), 403
+        restore_issue(id)
+        issue = Issue.query.get_or_404(id)
     if user.role != 'admin' and issue.author_id != user_id:
         return jsonify({'error': 'Forbidden'}), 403
     issue.title = data.get("title", issue.title)
@@ -110,9 +572,8 @@ def update_issue(id):
     # Handle tags
     tag_ids = data.get("tags", None)
     if tag_ids is not None:
-        issue.tags = Tag.query.filter(Tag.id.in_(tag_ids)).all()
+        issue.tags = tags_for_project(tag_ids, issue.project_id)
         # Explicitly update the timestamp when tags are modified
-        from datetime import datetime, timezone
         issue.updated_at = datetime.now(timezone.utc)
     db.session.commit()
     return jsonify(serialize_issue(issue))
@@ -122,17 +583,31 @@ def update_issue(id):
 def delete_issue(id):
     user_id = int(get_jwt_identity())
     user = User.query.get_or_404(user_id)
-    issue = Issue.query.get_or_404(id)
+    issue = Issue.query.get(id) or ArchivedIssue.query.get_or_404(id)
     if user.role != 'admin' and issue.author_id != user_id:
         return jsonify({'error': 'Forbidden'}), 403
-    db.session.delete(issue)
-    db.session.commit()
+    if isinstance(issue, ArchivedIssue):
+        delete_archived_issue(id)
+    else:
+        db.session.delete(issue)
+        db.session.commit()
     return jsonify({"message": "Issue deleted successfully"}), 204
 
 @main.route("/api/issues/<int:id>", methods=["GET"])
+@query_budget(6)
+@coalesce
 def get_issue(id):
-    issue = Issue.query.get_or_404(id)
-    return jsonify(serialize_issue(issue))
+    fields = parse_fields(set(ISSUE_FIELDS) | {"comment_count"})
+    include = parse_includes(ISSUE_INCLUDES)
+    issue = Issue.query.options(*issue_load_options(fields)).get(id)
+    if issue is None:
+        issue = ArchivedIssue.query.options(*issue_load_options(fields, ArchivedIssue)).get_or_404(id)
+    data = serialize_issue(issue, fields)
+    if "comments" in include:
+        # comment_count (on by default) is the total for paging through the rest
+        limit = min(max(parse_int_arg("comments_limit") or 10, 1), 100)
+        data["comments"] = embedded_comments(issue, include, limit)
+    return jsonify(data)
 
 @main.route("/api/issues", methods=["POST"])
 @jwt_required()
@@ -145,6 +620,7 @@ def create_issue():
     description = data.get("description", "")
     status_id = data.get("status_id")
     priority_id = data.get("priority_id")
+    project_id = data.get("project_id", current_app.config["DEFAULT_PROJECT_ID"])
 
     if not title:
         return jsonify({"error": "Title is required."}), 400
@@ -159,6 +635,10 @@ def create_issue():
         priority_id = int(priority_id)
     except (ValueError, TypeError):
         return jsonify({"error": "status_id and priority_id must be integers."}), 400
+    try:
+        project_id = int(project_id)
+    except (ValueError, TypeError):
+        return jsonify({"error": "project_id must be an integer."}), 400
 
     status = Status.query.get(status_id)
     if not status:
@@ -166,8 +646,11 @@ def create_issue():
     priority = Priority.query.get(priority_id)
     if not priority:
         return jsonify({"error": "Invalid priority_id."}), 400
+    if not Project.query.get(project_id):
+        return jsonify({"error": "Invalid project_id."}), 400
 
     new_issue = Issue(
+        project_id=project_id,
         title=title,
         description=description,
         status_id=status_id,
@@ -176,16 +659,22 @@ def create_issue():
     )
     tag_ids = data.get("tags", [])
     if tag_ids:
-        new_issue.tags = Tag.query.filter(Tag.id.in_(tag_ids)).all()
+        new_issue.tags = tags_for_project(tag_ids, project_id)
     db.session.add(new_issue)
     db.session.commit()
     return jsonify(serialize_issue(new_issue)), 201
 
 
 @main.route("/api/tags", methods=["GET"])
+@query_budget(1)
 def get_tags():
-    tags = Tag.query.order_by(Tag.display_order).all()
-    return jsonify([{ "id": tag.id, "name": tag.name, "color": tag.color, "display_order": tag.display_order } for tag in tags])
+    q = Tag.query
+    project_id = parse_int_arg("project_id")
+    if project_id is not None:
+        # The tags an issue in that project can use
+        q = q.filter(listed_in(project_id))
+    tags = q.order_by(Tag.display_order).all()
+    return jsonify([{ "id": tag.id, "name": tag.name, "color": tag.color, "display_order": tag.display_order, "project_id": tag.project_id } for tag in tags])
 
 @main.route("/api/tags", methods=["POST"])
 @jwt_required()
@@ -199,20 +688,36 @@ def create_tag():
     if not name or not color:
         return jsonify({'error': 'Name and color are required.'}), 400
     
-    # Check if tag name already exists
-    if Tag.query.filter_by(name=name).first():
+    # Tags without a project are shared by all of them
+    project_id = data.get('project_id')
+    if project_id is not None and (not isinstance(project_id, int) or not Project.query.get(project_id)):
+        return jsonify({'error': 'Invalid project_id.'}), 400
+
+    # Check if tag name already exists in the project
+    if tag_name_taken(name, project_id):
         return jsonify({'error': 'Tag name already exists.'}), 400
     
-    # Auto-assign display_order if not provided
+    # Auto-assign display_order if not provided: last in the list it joins
     display_order = data.get('display_order')
     if display_order is None:
-        max_order = db.session.query(db.func.max(Tag.display_order)).scalar() or 0
+        max_order = db.session.query(db.func.max(Tag.display_order)).filter(listed_in(project_id)).scalar() or 0
         display_order = max_order + 1
     
-    tag = Tag(name=name, color=color, display_order=display_order)
+    tag = Tag(name=name, color=color, display_order=display_order, project_id=project_id)
     db.session.add(tag)
     db.session.commit()
-    return jsonify({'id': tag.id, 'name': tag.name, 'color': tag.color, 'display_order': tag.display_order}), 201
+    return jsonify({'id': tag.id, 'name': tag.name, 'color': tag.color, 'display_order': tag.display_order, 'project_id': tag.project_id}), 201
+
+@main.route("/api/tags/order", methods=["PUT"])
+@query_budget(4)
+@jwt_required()
+def reorder_tags():
+    # {"order": [...], "project_id": 3} orders that project's list: its own
+    # tags and the shared ones; without project_id only the shared tags
+    project_id = (request.get_json(silent=True) or {}).get('project_id')
+    if project_id is not None and (not isinstance(project_id, int) or not Project.query.get(project_id)):
+        return jsonify({'error': 'Invalid project_id.'}), 400
+    return reorder(Tag, ("id", "name", "color", "project_id"), listed_in(project_id))
 
 @main.route("/api/tags/<int:id>", methods=["PUT"])
 @jwt_required()
@@ -227,9 +732,8 @@ def update_tag(id):
     display_order = data.get('display_order')
     if name is not None:
         name = name.strip()
-        # Check if tag name already exists (excluding current tag)
-        existing_tag = Tag.query.filter_by(name=name).first()
-        if existing_tag and existing_tag.id != id:
+        # Check if tag name already exists in the project (excluding current tag)
+        if tag_name_taken(name, tag.project_id, exclude_id=id):
             return jsonify({'error': 'Tag name already exists.'}), 400
         tag.name = name
     if color is not None:
@@ -249,6 +753,10 @@ def delete_tag(id):
     if user.role != 'admin':
         return jsonify({'error': 'Forbidden'}), 403
     tag = Tag.query.get_or_404(id)
+    # The tag links go away through the FK cascade, so record the issues it
+    # was on for the change feed, the issue cache and the tag index
+    issue_ids = db.session.execute(select(IssueTag.issue_id).where(IssueTag.tag_id == id)).scalars().all()
+    log_changes(db.session, [(("issue", issue_id, issue_id), "upsert") for issue_id in issue_ids])
     db.session.delete(tag)
     db.session.commit()
     return jsonify({'message': 'Tag deleted successfully'}), 204
@@ -268,9 +776,11 @@ def register():
     user.set_password(password)
     db.session.add(user)
     db.session.commit()
+    user_cache.bump()
     access_token = create_access_token(identity=str(user.id))
     return jsonify({
         "access_token": access_token,
+        "refresh_token": create_refresh_token(identity=str(user.id)),
         "user": {
             "id": user.id,
             "name": user.name,
@@ -292,6 +802,7 @@ def login():
     access_token = create_access_token(identity=str(user.id))
     return jsonify({
         "access_token": access_token,
+        "refresh_token": create_refresh_token(identity=str(user.id)),
         "user": {
             "id": user.id,
             "name": user.name,
@@ -300,7 +811,30 @@ def login():
         }
     })
 
+@main.route("/api/token/refresh", methods=["POST"])
+@query_budget(3)
+@jwt_required(refresh=True)
+def refresh_token():
+    # No password check: the signature and the revocation lookup are the whole cost.
+    # Each refresh token works once; it is revoked as it is traded in.
+    claims = get_jwt()
+    identity = get_jwt_identity()
+    if not revocations.revoke(claims["jti"], int(identity), claims["exp"]):
+        return jsonify({"error": "Refresh token has already been used."}), 401
+    return jsonify({
+        "access_token": create_access_token(identity=identity),
+        "refresh_token": create_refresh_token(identity=identity)
+    })
+
+@main.route("/api/logout", methods=["POST"])
+@jwt_required(refresh=True)
+def logout():
+    claims = get_jwt()
+    revocations.revoke(claims["jti"], int(get_jwt_identity()), claims["exp"])
+    return jsonify({"message": "Logged out"})
+
 @main.route("/api/issues/<int:issue_id>/comments", methods=["GET"])
+@query_budget(4)
 def get_comments(issue_id):
     # Parse query params
     try:
@@ -315,38 +849,43 @@ def get_comments(issue_id):
     author_name = request.args.get("author_name")
     start_date = request.args.get("start")
     end_date = request.args.get("end")
+    fields = parse_fields(COMMENT_FIELDS)
+    count_mode = parse_count_mode()
+
+    # Comments moved to the archive with their issue
+    archived = db.session.query(ArchivedIssue.query.filter_by(id=issue_id).exists()).scalar()
+    model = ArchivedComment if archived else Comment
 
     # Build query
-    q = Comment.query.filter(Comment.issue_id == issue_id)
+    q = model.query.filter(model.issue_id == issue_id)
     
     if author_name:
         # Join with User table to filter by name
-        q = q.join(User, Comment.author_id == User.id).filter(User.name.ilike(f"%{author_name}%"))
+        q = q.join(User, model.author_id == User.id).filter(User.name.ilike(f"%{author_name}%"))
     
     if start_date:
         try:
-            from datetime import datetime
             start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            q = q.filter(Comment.created_at >= start_dt)
+            q = q.filter(model.created_at >= start_dt)
         except Exception:
             pass
     
     if end_date:
         try:
-            from datetime import datetime
             end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            q = q.filter(Comment.created_at <= end_dt)
+            q = q.filter(model.created_at <= end_dt)
         except Exception:
             pass
     
-    total = q.count()
-    comments = q.order_by(Comment.updated_at.desc()).offset(skip).limit(limit).all()
+    total, count_mode = count_rows(q, count_mode)
+    comments = q.options(*comment_load_options(fields, model)).order_by(model.updated_at.desc()).offset(skip).limit(limit).all()
 
     return jsonify({
         "total_count": total,
+        "count_mode": count_mode,
         "skip": skip,
         "limit": limit,
-        "data": [serialize_comment(comment) for comment in comments]
+        "data": [serialize_comment(comment, fields) for comment in comments]
     })
 
 @main.route("/api/issues/<int:issue_id>/comments", methods=["POST"])
@@ -366,9 +905,10 @@ def create_comment(issue_id):
     )
     
     # Update the parent issue's timestamp when a new comment is added
+    if Issue.query.get(issue_id) is None:
+        restore_issue(issue_id)
     issue = Issue.query.get_or_404(issue_id)
-    from datetime import datetime, timezone
-    issue.updated_at = datetime.now(timezone.utc)
+    issue_touch.touch(issue)
     
     db.session.add(new_comment)
     db.session.commit()
@@ -376,43 +916,59 @@ def create_comment(issue_id):
     return jsonify({
         "id": new_comment.id,
         "content": new_comment.content,
-        "created_at": new_comment.created_at.isoformat(),
-        "updated_at": new_comment.updated_at.isoformat(),
+        "created_at": new_comment.created_at,
+        "updated_at": new_comment.updated_at,
         "author": {"id": user.id, "name": user.name}
     }), 201
 
+def hot_comment(comment_id, user):
+    """The comment behind PUT/DELETE /api/comments/<id>, or an error response.
+
+    Writing a comment touches its issue, so a comment on an archived issue
+    moves back with the issue first, as editing the issue itself does.
+    """
+    comment = Comment.query.get(comment_id)
+    if comment is None:
+        archived = ArchivedComment.query.get_or_404(comment_id)
+        if user.role != 'admin' and archived.author_id != user.id:
+            return None, (jsonify({'error': 'Forbidden'}), 403)
+        restore_issue(archived.issue_id)
+        comment = Comment.query.get_or_404(comment_id)
+    if user.role != 'admin' and comment.author_id != user.id:
+        return None, (jsonify({'error': 'Forbidden'}), 403)
+    return comment, None
+
 @main.route("/api/comments/<int:comment_id>", methods=["PUT"])
 @jwt_required()
 def update_comment(comment_id):
     user_id = int(get_jwt_identity())
     user = User.query.get_or_404(user_id)
-    comment = Comment.query.get_or_404(comment_id)
-    
-    if user.role != 'admin' and comment.author_id != user_id:
-        return jsonify({'error': 'Forbidden'}), 403
+    comment, error = hot_comment(comment_id, user)
+    if error:
+        return error
     
     data = request.get_json()
     if not data or not data.get("content"):
         return jsonify({"error": "Content is required"}), 400
     
-    comment.content = data["content"]
-    
-    # Update the parent issue's timestamp when a comment is updated
+    # Update the parent issue's timestamp when a comment is updated; loaded
+    # first so the edit isn't autoflushed on its own
     issue = Issue.query.get_or_404(comment.issue_id)
-    from datetime import datetime, timezone
-    issue.updated_at = datetime.now(timezone.utc)
+    issue_touch.touch(issue)
+    comment.content = data["content"]
     
     db.session.commit()
     
     return jsonify({
         "id": comment.id,
         "content": comment.content,
-        "created_at": comment.created_at.isoformat(),
-        "updated_at": comment.updated_at.isoformat(),
+        "created_at": comment.created_at,
+        "updated_at": comment.updated_at,
         "author": {"id": comment.author.id, "name": comment.author.name} if comment.author else None
     })
 
 @main.route("/api/comments", methods=["GET"])
+@query_budget(3)
 @jwt_required()
 def get_all_comments():
     try:
@@ -430,6 +986,8 @@ def get_all_comments():
         issue_id = request.args.get("issue_id")
         start_date = request.args.get("start")
         end_date = request.args.get("end")
+        fields = parse_fields(COMMENT_FIELDS)
+        count_mode = parse_count_mode()
 
         # Build query
         q = Comment.query
@@ -448,7 +1006,6 @@ def get_all_comments():
         
         if start_date:
             try:
-                from datetime import datetime
                 start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
                 q = q.filter(Comment.updated_at >= start_dt)
             except Exception:
@@ -456,24 +1013,25 @@ def get_all_comments():
         
         if end_date:
             try:
-                from datetime import datetime
                 end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-                q = q.filter(Comment.updated_at <= end_dt)
+                # updated_at >= created_at, so this bound is implied; spelling it
+                # out lets Postgres prune the created_at partitions
+                q = q.filter(Comment.updated_at <= end_dt, Comment.created_at <= end_dt)
             except Exception:
                 pass
         
-        total = q.count()
-        comments = q.order_by(Comment.updated_at.desc()).offset(skip).limit(limit).all()
+        total, count_mode = count_rows(q, count_mode)
+        comments = q.options(*comment_load_options(fields)).order_by(Comment.updated_at.desc()).offset(skip).limit(limit).all()
 
         return jsonify({
             "total_count": total,
+            "count_mode": count_mode,
             "skip": skip,
             "limit": limit,
-            "data": [serialize_comment(comment) for comment in comments]
+            "data": [serialize_comment(comment, fields) for comment in comments]
         })
     except Exception as e:
         print(f"Error in get_all_comments: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({"error": "Internal server error"}), 500
 
@@ -482,15 +1040,13 @@ def get_all_comments():
 def delete_comment(comment_id):
     user_id = int(get_jwt_identity())
     user = User.query.get_or_404(user_id)
-    comment = Comment.query.get_or_404(comment_id)
-    
-    if user.role != 'admin' and comment.author_id != user_id:
-        return jsonify({'error': 'Forbidden'}), 403
+    comment, error = hot_comment(comment_id, user)
+    if error:
+        return error
     
     # Update the parent issue's timestamp when a comment is deleted
     issue = Issue.query.get_or_404(comment.issue_id)
-    from datetime import datetime, timezone
-    issue.updated_at = datetime.now(timezone.utc)
+    issue_touch.touch(issue)
     
     db.session.delete(comment)
     db.session.commit()
@@ -499,6 +1055,7 @@ def delete_comment(comment_id):
 
 # --- Statuses CRUD ---
 @main.route('/api/statuses', methods=['GET'])
+@query_budget(1)
 def get_statuses():
     statuses = Status.query.order_by(Status.display_order).all()
     return jsonify([{ 'id': s.id, 'name': s.name, 'display_order': s.display_order } for s in statuses])
@@ -527,6 +1084,12 @@ def create_status():
     db.session.commit()
     return jsonify({'id': status.id, 'name': status.name, 'display_order': status.display_order}), 201
 
+@main.route('/api/statuses/order', methods=['PUT'])
+@query_budget(3)
+@jwt_required()
+def reorder_statuses():
+    return reorder(Status, ('id', 'name'))
+
 @main.route('/api/statuses/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_status(id):
@@ -551,6 +1114,7 @@ def update_status(id):
     return jsonify({'id': status.id, 'name': status.name, 'display_order': status.display_order})
 
 @main.route('/api/statuses/<int:id>/usage', methods=['GET'])
+@query_budget(4)
 @jwt_required()
 def get_status_usage(id):
     user = User.query.get_or_404(int(get_jwt_identity()))
@@ -573,8 +1137,8 @@ def delete_status(id):
         return jsonify({'error': 'Forbidden'}), 403
     status = Status.query.get_or_404(id)
     
-    # Check if status is in use by any issues
-    affected_issues = Issue.query.filter_by(status_id=id).all()
+    # Check if status is in use by any issues, archived ones included
+    affected_issues = Issue.query.filter_by(status_id=id).all() + ArchivedIssue.query.filter_by(status_id=id).all()
     if affected_issues:
         return jsonify({
             "error": "Cannot delete, in use",
@@ -588,6 +1152,7 @@ def delete_status(id):
 
 # --- Priorities CRUD ---
 @main.route('/api/priorities', methods=['GET'])
+@query_budget(1)
 def get_priorities():
     priorities = Priority.query.order_by(Priority.display_order).all()
     return jsonify([{ 'id': p.id, 'name': p.name, 'display_order': p.display_order } for p in priorities])
@@ -616,6 +1181,12 @@ def create_priority():
     db.session.commit()
     return jsonify({'id': priority.id, 'name': priority.name, 'display_order': priority.display_order}), 201
 
+@main.route('/api/priorities/order', methods=['PUT'])
+@query_budget(3)
+@jwt_required()
+def reorder_priorities():
+    return reorder(Priority, ('id', 'name'))
+
 @main.route('/api/priorities/<int:id>', methods=['PUT'])
 @jwt_required()
 def update_priority(id):
@@ -640,6 +1211,7 @@ def update_priority(id):
     return jsonify({'id': priority.id, 'name': priority.name, 'display_order': priority.display_order})
 
 @main.route('/api/priorities/<int:id>/usage', methods=['GET'])
+@query_budget(4)
 @jwt_required()
 def get_priority_usage(id):
     user = User.query.get_or_404(int(get_jwt_identity()))
@@ -662,8 +1234,8 @@ def delete_priority(id):
         return jsonify({'error': 'Forbidden'}), 403
     priority = Priority.query.get_or_404(id)
     
-    # Check if priority is in use by any issues
-    affected_issues = Issue.query.filter_by(priority_id=id).all()
+    # Check if priority is in use by any issues, archived ones included
+    affected_issues = Issue.query.filter_by(priority_id=id).all() + ArchivedIssue.query.filter_by(priority_id=id).all()
     if affected_issues:
         return jsonify({
             "error": "Cannot delete, in use",
@@ -677,6 +1249,7 @@ def delete_priority(id):
 
 # --- User Profile Endpoints ---
 @main.route('/api/users/<int:id>', methods=['GET'])
+@query_budget(9)
 @jwt_required()
 def get_user_profile(id):
     try:
@@ -716,15 +1289,16 @@ def get_user_profile(id):
                 ).count()
         
         # Get user's issues (compact form)
-        user_issues = Issue.query.filter_by(author_id=target_user.id).order_by(Issue.updated_at.desc()).limit(10).all()
+        user_issues = (Issue.query.options(joinedload(Issue.status), joinedload(Issue.priority))
+                       .filter_by(author_id=target_user.id).order_by(Issue.updated_at.desc()).limit(10).all())
         my_issues = []
         for issue in user_issues:
             try:
                 my_issues.append({
                     "id": issue.id,
                     "title": issue.title,
-                    "created_at": issue.created_at.isoformat(),
-                    "updated_at": issue.updated_at.isoformat(),
+                    "created_at": issue.created_at,
+                    "updated_at": issue.updated_at,
                     "status": {"id": issue.status.id, "name": issue.status.name} if issue.status else None,
                     "priority": {"id": issue.priority.id, "name": issue.priority.name} if issue.priority else None
                 })
@@ -734,14 +1308,15 @@ def get_user_profile(id):
                 continue
         
         # Get user's comments (compact form)
-        user_comments = Comment.query.filter_by(author_id=target_user.id).order_by(Comment.updated_at.desc()).limit(10).all()
+        user_comments = (Comment.query.options(joinedload(Comment.issue).load_only(Issue.id, Issue.title))
+                         .filter_by(author_id=target_user.id).order_by(Comment.updated_at.desc()).limit(10).all())
         my_comments = []
         for comment in user_comments:
             try:
                 my_comments.append({
                     "id": comment.id,
                     "content": comment.content,
-                    "updated_at": comment.updated_at.isoformat(),
+                    "updated_at": comment.updated_at,
                     "issue": {"id": comment.issue.id, "title": comment.issue.title} if comment.issue else None
                 })
             except Exception as e:
@@ -764,7 +1339,6 @@ def get_user_profile(id):
         })
     except Exception as e:
         print(f"Error in get_user_profile for user {id}: {e}")
-        import traceback
         traceback.print_exc()
         return jsonify({'error': 'Internal server error'}), 500
 
@@ -794,8 +1368,11 @@ def update_user_profile(id):
         if not new_password:
             return jsonify({'error': 'Password cannot be empty'}), 400
         target_user.set_password(new_password)
+        # Sign out every session that still holds a refresh token from before
+        target_user.tokens_not_before = datetime.now(timezone.utc).replace(microsecond=0)
     
     db.session.commit()
+    user_cache.bump()
     
     # Return updated user info (excluding password hash)
     return jsonify({
@@ -805,7 +1382,100 @@ def update_user_profile(id):
         "role": target_user.role
     })
 
+def prefix_pattern(term):
+    """LIKE pattern matching values that start with term, case-insensitively."""
+    escaped = term.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
 @main.route("/api/users", methods=["GET"])
+@query_budget(3)
+@jwt_required()
 def get_users():
-    users = User.query.all()
-    return jsonify([{ "id": user.id, "name": user.name, "email": user.email } for user in users])
+    try:
+        skip = max(int(request.args.get("skip", 0)), 0)
+    except (TypeError, ValueError):
+        skip = 0
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), 100)
+    except (TypeError, ValueError):
+        limit = 20
+    search = (request.args.get("q") or "").strip()
+    count_mode = parse_count_mode()
+
+    # The author picker opens on the first page, so that one is cached briefly
+    cache_key = None
+    if skip == 0 and user_cache.enabled:
+        cache_key = user_cache.key("users", limit=limit, q=search.lower() or None, count=count_mode,
+                                   format=response_format())
+        body = user_cache.get(cache_key)
+        if body is not None:
+            return cached_response(body, "HIT")
+
+    # Only the public columns; never load full User rows with password_hash
+    stmt = select(User.id, User.name, User.email)
+    if search:
+        pattern = prefix_pattern(search)
+        stmt = stmt.where(or_(db.func.lower(User.name).like(pattern, escape="\\"),
+                              db.func.lower(User.email).like(pattern, escape="\\")))
+    total, count_mode = count_rows(stmt, count_mode)
+    rows = db.session.execute(stmt.order_by(User.name, User.id).offset(skip).limit(limit)).all()
+
+    payload = {
+        "total_count": total,
+        "count_mode": count_mode,
+        "skip": skip,
+        "limit": limit,
+        "data": [{"id": row.id, "name": row.name, "email": row.email} for row in rows]
+    }
+    if cache_key is None:
+        return jsonify(payload)
+    body = encode_body(payload)
+    user_cache.set(cache_key, body)
+    return cached_response(body, "MISS")
+
+# --- Background Jobs ---
+def serialize_job(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "params": job.params,
+        "status": job.status,
+        "processed": job.processed,
+        "total": job.total,
+        "progress": min(job.processed / job.total, 1.0) if job.total else (1.0 if job.status == "done" else None),
+        "attempts": job.attempts,
+        "error": job.error if job.status == "failed" else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+@main.route("/api/jobs", methods=["POST"])
+@jwt_required()
+def create_job():
+    user = User.query.get_or_404(int(get_jwt_identity()))
+    if user.role != 'admin':
+        return jsonify({'error': 'Forbidden'}), 403
+    data = request.get_json() or {}
+    kind = data.get("kind")
+    if not isinstance(kind, str):
+        return jsonify({'error': 'kind must be a string.'}), 400
+    params = data.get("params") or {}
+    if not isinstance(params, dict):
+        return jsonify({'error': 'params must be an object.'}), 400
+    job, error = enqueue(kind, params, user.id)
+    if error:
+        return jsonify({'error': error}), 400
+    response = jsonify(serialize_job(job))
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return response, 202
+
+@main.route("/api/jobs/<int:id>", methods=["GET"])
+@query_budget(2)
+@jwt_required()
+def get_job(id):
+    user = User.query.get_or_404(int(get_jwt_identity()))
+    job = Job.query.get_or_404(id)
+    if user.role != 'admin' and job.created_by != user.id:
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify(serialize_job(job))
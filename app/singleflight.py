@@ -0,0 +1,72 @@
+import threading
+from functools import wraps
+
+from flask import current_app, request
+
+from .negotiation import response_format
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """Run one computation per key at a time; concurrent callers share its result.
+
+    A caller that waits longer than `timeout`, or whose leader failed,
+    computes the result itself instead.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, timeout):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(timeout) and call.result is not None:
+                return call.result, True
+            return fn(), False
+
+        try:
+            call.result = fn()
+            return call.result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+flight = SingleFlight()
+
+
+def coalesce(view):
+    """Coalesce concurrent identical GETs of a public read endpoint.
+
+    Only use this on views whose response depends on nothing but the path and
+    query string, since waiters receive the leader's response verbatim.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('SINGLE_FLIGHT_ENABLED', True):
+            return view(*args, **kwargs)
+
+        def compute():
+            response = current_app.make_response(view(*args, **kwargs))
+            return response.get_data(), response.status_code, list(response.headers.items())
+
+        # Callers negotiating different formats must not share a body
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), response_format())
+        (body, status, headers), shared = flight.do(key, compute, current_app.config.get('SINGLE_FLIGHT_TIMEOUT', 5))
+        response = current_app.response_class(body, status=status, headers=headers)
+        if shared:
+            response.headers['X-Coalesced'] = '1'
+        return response
+    return wrapper
@@ -0,0 +1,66 @@
+import builtins
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Timings for STARTUP_PROFILE=1: every import statement executed by the
+    app package (cumulative, like -X importtime) and each create_app step."""
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.imports = []
+        self.steps = []
+        self._original_import = None
+        self._depth = 0
+        if enabled:
+            self._install()
+
+    def _install(self):
+        self._original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            importer = (globals or {}).get('__name__', '')
+            if self._depth or not name or not (importer == 'app' or importer.startswith('app.')) or name in sys.modules:
+                return self._original_import(name, globals, locals, fromlist, level)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return self._original_import(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+                label = '.' * level + name
+                self.imports.append((f"{importer}: import {label}", time.perf_counter() - start))
+
+        builtins.__import__ = timed_import
+
+    def uninstall(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    @contextmanager
+    def step(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        lines = [f"startup: {total * 1000:.1f} ms since app package import"]
+        for title, rows in (("imports", self.imports), ("create_app", self.steps)):
+            lines.append(f"  {title}:")
+            for name, seconds in sorted(rows, key=lambda row: -row[1]):
+                lines.append(f"    {seconds * 1000:8.1f} ms  {name}")
+        return "\n".join(lines)
+
+
+startup_profile = StartupProfile(os.getenv("STARTUP_PROFILE") == "1")
@@ -0,0 +1,139 @@
+import threading
+import time
+
+from sqlalchemy import select
+
+from . import db
+from .models import Change, Issue, IssueTag
+from .txid import commit_horizon
+
+try:
+    from pyroaring import BitMap
+except ImportError:  # pyroaring is optional, without it tag filters stay in SQL
+    BitMap = None
+
+
+class TagIndex:
+    """Per-worker map of tag id -> bitmap of issue ids in the hot issues table.
+
+    Built when the worker starts (or on first use) and kept current by
+    replaying issue entries from the change log, so writes made by other workers are picked up too. Replay
+    follows the log's commit order (txid below the commit horizon), and the
+    index is rebuilt every TAG_INDEX_REBUILD_SECONDS so entries pruned from
+    the log while a worker sat idle cannot leave it stale.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.tags = {}
+        # issue id -> its tag ids, so catch-up only touches the bitmaps an issue was in
+        self.issue_tags = {}
+        self.issues = None
+        self.token = None
+        self.built_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('TAG_INDEX_ENABLED', True)
+        app.config.setdefault('TAG_INDEX_MAX_CANDIDATES', 10000)
+        app.config.setdefault('TAG_INDEX_REBUILD_SECONDS', 3600)
+        self.app = app
+        # A new app may sit on another database; build again on first use
+        self.token = None
+
+    @property
+    def enabled(self):
+        return BitMap is not None and self.app is not None and self.app.config['TAG_INDEX_ENABLED']
+
+    def warm(self):
+        """Build the index ahead of the first request (gunicorn's post_worker_init)."""
+        if not self.enabled:
+            return
+        with self.app.app_context():
+            try:
+                self.refresh()
+            except Exception:
+                # The first tag-filtered request builds it instead
+                self.app.logger.exception("Could not build the tag index at worker start")
+
+    def _build(self):
+        # Read the token first: changes committed while loading get replayed, which is harmless
+        self.token = db.session.execute(select(commit_horizon())).scalar() - 1
+        self.built_at = time.monotonic()
+        by_tag, issue_tags = {}, {}
+        for issue_id, tag_id in db.session.execute(select(IssueTag.issue_id, IssueTag.tag_id)):
+            by_tag.setdefault(tag_id, []).append(issue_id)
+            issue_tags.setdefault(issue_id, []).append(tag_id)
+        self.tags = {tag_id: BitMap(ids) for tag_id, ids in by_tag.items()}
+        self.issue_tags = issue_tags
+        self.issues = BitMap(db.session.execute(select(Issue.id)).scalars())
+
+    def _catch_up(self):
+        latest = {}
+        for token, issue_id, op in db.session.execute(
+            select(Change.txid, Change.entity_id, Change.op)
+            .where(Change.txid > self.token, Change.txid < commit_horizon(), Change.entity == 'issue')
+            .order_by(Change.txid, Change.id)
+        ):
+            latest[issue_id] = op
+            self.token = token
+        if not latest:
+            return
+        for issue_id in latest:
+            self.issues.discard(issue_id)
+            for tag_id in self.issue_tags.pop(issue_id, ()):
+                self.tags[tag_id].discard(issue_id)
+        upserted = [issue_id for issue_id, op in latest.items() if op == 'upsert']
+        if not upserted:
+            return
+        for issue_id in db.session.execute(select(Issue.id).where(Issue.id.in_(upserted))).scalars():
+            self.issues.add(issue_id)
+        for issue_id, tag_id in db.session.execute(
+            select(IssueTag.issue_id, IssueTag.tag_id).where(IssueTag.issue_id.in_(upserted))
+        ):
+            self.tags.setdefault(tag_id, BitMap()).add(issue_id)
+            self.issue_tags.setdefault(issue_id, []).append(tag_id)
+
+    def refresh(self):
+        with self._lock:
+            if self.token is None or time.monotonic() - self.built_at > self.app.config['TAG_INDEX_REBUILD_SECONDS']:
+                self._build()
+            else:
+                self._catch_up()
+
+    def _match(self, any_of, all_of, none_of):
+        empty = BitMap()
+        result = self.issues
+        if any_of:
+            matched = BitMap()
+            for tag_id in any_of:
+                matched = matched | self.tags.get(tag_id, empty)
+            result = result & matched
+        for tag_id in all_of or ():
+            result = result & self.tags.get(tag_id, empty)
+        for tag_id in none_of or ():
+            result = result - self.tags.get(tag_id, empty)
+        return result
+
+    def candidates(self, any_of=None, all_of=None, none_of=None):
+        """Issue ids matching the tag filters, or None when the set is too large
+        to hand to SQL as an id list (callers then filter in SQL instead)."""
+        self.refresh()
+        with self._lock:
+            result = self._match(any_of, all_of, none_of)
+            if len(result) > self.app.config['TAG_INDEX_MAX_CANDIDATES']:
+                return None
+            return list(result)
+
+    def tag_counts(self, any_of=None, all_of=None, none_of=None):
+        """Issues per tag among those matching the tag filters, as {tag_id: count}."""
+        self.refresh()
+        with self._lock:
+            result = self._match(any_of, all_of, none_of)
+            counts = {tag_id: result.intersection_cardinality(bitmap) for tag_id, bitmap in self.tags.items()}
+        return {tag_id: count for tag_id, count in counts.items() if count}
+
+
+tag_index = TagIndex()
@@ -0,0 +1,81 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from . import db, jwt
+from .models import RevokedToken, User
+
+
+class RevocationList:
+    """Revoked refresh tokens: an in-process map of jti -> expiry in front of
+    the revoked_tokens table.
+
+    Tokens revoked by this worker, or already looked up here, are answered
+    from memory; anything else costs one lookup on the unique jti index, so
+    revocations made by other workers are still seen.
+    """
+
+    def __init__(self, maxsize=10000, prune_every=3600):
+        self.maxsize = maxsize
+        self.prune_every = prune_every
+        self._revoked = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def _remember(self, jti, expires):
+        with self._lock:
+            self._revoked[jti] = expires
+            self._revoked.move_to_end(jti)
+            while len(self._revoked) > self.maxsize:
+                self._revoked.popitem(last=False)
+
+    def is_revoked(self, jti):
+        with self._lock:
+            if jti in self._revoked:
+                return True
+        expires = db.session.execute(select(RevokedToken.expires_at).where(RevokedToken.jti == jti)).scalar()
+        if expires is None:
+            return False
+        self._remember(jti, expires)
+        return True
+
+    def revoke(self, jti, user_id, exp):
+        """Record a refresh token as used up. Returns False if it already was,
+        i.e. a concurrent rotation of the same token won."""
+        expires = datetime.fromtimestamp(exp, timezone.utc)
+        db.session.add(RevokedToken(jti=jti, user_id=user_id, expires_at=expires))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            self._remember(jti, expires)
+            return False
+        self._remember(jti, expires)
+        if time.monotonic() - self._last_prune > self.prune_every:
+            self._last_prune = time.monotonic()
+            # Expired tokens fail the signature check anyway, so their rows can go
+            db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.now(timezone.utc)))
+            db.session.commit()
+        return True
+
+
+revocations = RevocationList()
+
+
+def issued_before_password_change(user_id, iat):
+    """Whether a token issued at `iat` predates the user's last password change."""
+    not_before = db.session.execute(select(User.tokens_not_before).where(User.id == user_id)).scalar()
+    return not_before is not None and iat < not_before.replace(tzinfo=timezone.utc).timestamp()
+
+
+@jwt.token_in_blocklist_loader
+def is_token_revoked(jwt_header, jwt_payload):
+    # Access tokens are short-lived and never revoked, so they skip the lookup
+    if jwt_payload.get("type") != "refresh":
+        return False
+    return revocations.is_revoked(jwt_payload["jti"]) or \
+        issued_before_password_change(int(jwt_payload["sub"]), jwt_payload["iat"])
@@ -0,0 +1,98 @@
+import atexit
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import DateTime, Integer, column, func, update, values
+
+from . import db
+from .changes import log_changes
+from .models import Issue
+
+
+def touch_statement(touched):
+    issues = Issue.__table__
+    return (update(issues)
+            .where(issues.c.id == touched.c.id)
+            .values(updated_at=func.greatest(issues.c.updated_at, touched.c.ts)))
+
+
+class IssueTouch:
+    """Bumps a parent issue's updated_at when one of its comments changes.
+
+    In the default "inline" mode the issue row is updated in the comment's own
+    transaction. In "buffered" mode the touch is only remembered in memory and
+    a background thread writes the latest timestamp per issue in one
+    UPDATE ... FROM (VALUES ...) every ISSUE_TOUCH_FLUSH_MS, so comment writes
+    on a busy issue no longer queue on its row lock. List ordering by
+    updated_at then lags by at most one flush interval. Buffered mode needs
+    Postgres (UPDATE ... FROM VALUES and GREATEST).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('ISSUE_TOUCH_MODE', 'inline')
+        app.config.setdefault('ISSUE_TOUCH_FLUSH_MS', 500)
+        self.app = app
+
+    @property
+    def buffered(self):
+        return self.app is not None and self.app.config['ISSUE_TOUCH_MODE'] == 'buffered'
+
+    def touch(self, issue):
+        now = datetime.now(timezone.utc)
+        if not self.buffered:
+            issue.updated_at = now
+            return
+        with self._lock:
+            self._pending[issue.id] = max(self._pending.get(issue.id, now), now)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+                atexit.register(self._flush_on_exit)
+
+    def flush(self):
+        """Write all pending touches; must run inside an app context."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        touched = values(column('id', Integer), column('ts', DateTime), name='touched').data(
+            sorted(pending.items())  # a stable lock order across workers
+        )
+        try:
+            db.session.execute(touch_statement(touched))
+            log_changes(db.session, [(('issue', issue_id, issue_id), 'upsert') for issue_id in pending])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Keep the touches for the next attempt
+            with self._lock:
+                for issue_id, ts in pending.items():
+                    self._pending[issue_id] = max(self._pending.get(issue_id, ts), ts)
+            raise
+        return len(pending)
+
+    def _run(self):
+        interval = self.app.config['ISSUE_TOUCH_FLUSH_MS'] / 1000
+        while True:
+            time.sleep(interval)
+            try:
+                with self.app.app_context():
+                    self.flush()
+            except Exception as e:
+                print(f"Error flushing issue touches: {e}")
+
+    def _flush_on_exit(self):
+        with self.app.app_context():
+            self.flush()
+
+
+issue_touch = IssueTouch()
@@ -0,0 +1,40 @@
+from sqlalchemy import BigInteger
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class current_txid(FunctionElement):
+    """Id of the writing transaction; orders the change log by commit
+    visibility instead of by when rows were flushed."""
+    type = BigInteger()
+    inherit_cache = True
+
+
+class commit_horizon(FunctionElement):
+    """Smallest transaction id that may still be in flight. Every change row
+    below it is committed (or never will be), so no new row can appear there."""
+    type = BigInteger()
+    inherit_cache = True
+
+
+@compiles(current_txid, 'postgresql')
+def _pg_current_txid(element, compiler, **kw):
+    return "pg_current_xact_id()::text::bigint"
+
+
+@compiles(commit_horizon, 'postgresql')
+def _pg_commit_horizon(element, compiler, **kw):
+    return "pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+
+
+# SQLite has one writer at a time, so insertion order is commit order and
+# everything visible is final
+
+@compiles(current_txid)
+def _current_txid(element, compiler, **kw):
+    return "(SELECT coalesce(max(txid), 0) + 1 FROM changes)"
+
+
+@compiles(commit_horizon)
+def _commit_horizon(element, compiler, **kw):
+    return "(SELECT coalesce(max(txid), 0) + 1 FROM changes)"
@@ -0,0 +1,66 @@
+"""Compare the stdlib and orjson JSON providers on issue list payloads.
+
+    python bench_json.py [page_size] [rounds]
+"""
+import sys
+import timeit
+from datetime import datetime, timezone
+
+from app import create_app
+from app.json_provider import PROVIDERS, orjson
+from app.models import Issue, Priority, Status, Tag, User
+from app.routes import serialize_issue
+
+
+def build_issues(count):
+    status = Status(id=1, name="open")
+    priority = Priority(id=2, name="high")
+    author = User(id=3, name="Jane Smith")
+    tags = [Tag(id=i, name=f"tag-{i}", color="blue") for i in range(1, 4)]
+    now = datetime.now(timezone.utc)
+    return [
+        Issue(
+            id=i,
+            title=f"Issue number {i} with a realistic title",
+            description="The login page is not responsive on mobile devices. " * 8,
+            status=status,
+            priority=priority,
+            author=author,
+            tags=tags,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    app = create_app()
+    with app.app_context():
+        payload = {
+            "total_count": page_size,
+            "skip": 0,
+            "limit": page_size,
+            "data": [serialize_issue(issue, comment_count=3) for issue in build_issues(page_size)],
+        }
+
+        names = ["stdlib"] + (["orjson"] if orjson is not None else [])
+        results = {}
+        for name in names:
+            provider = PROVIDERS[name](app)
+            with app.test_request_context():
+                seconds = timeit.timeit(lambda: provider.response(payload).get_data(), number=rounds)
+            results[name] = seconds / rounds * 1000
+            print(f"{name:>7}: {results[name]:.3f} ms per response ({page_size} issues)")
+
+        if "orjson" in results:
+            print(f"speedup: {results['stdlib'] / results['orjson']:.1f}x")
+        else:
+            print("orjson is not installed, only the stdlib provider was measured")
+
+
+if __name__ == "__main__":
+    main()
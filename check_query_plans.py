@@ -0,0 +1,266 @@
+"""Check the query plans behind the read routes against a seeded Postgres database.
+
+    python check_query_plans.py [--seed] [--update] [--max-seq-rows N]
+
+DATABASE_URL must point at a scratch Postgres database migrated to head
+(flask db upgrade). --seed fills it with a mid-size dataset first and
+refuses to touch a database that already has issues.
+
+Each case below is requested through the test client, every SELECT it runs
+is captured and EXPLAINed with its real parameters, and the run fails when
+  * a sequential scan reads issues or comments (or a comment partition)
+    while that table holds more than --max-seq-rows rows,
+  * the index a case expects does not appear in any of its plans, or
+  * a plan's shape differs from its snapshot in query_plans/.
+Run with --update to accept plan changes; the snapshots are plain text so
+they show up in review next to the change that caused them.
+"""
+import argparse
+import os
+import re
+import sys
+from pathlib import Path
+
+# Responses must come from SQL, not from the caches or the tag bitmap index
+os.environ["ISSUE_CACHE_BACKEND"] = "none"
+os.environ["USER_CACHE_BACKEND"] = "none"
+os.environ["TAG_INDEX_ENABLED"] = "0"
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event, text
+
+from app import create_app, db
+from app.partitions import ensure_future_partitions, index_partitions
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "query_plans"
+
+USERS = 5_000
+PROJECTS = 20
+TAGS = 50
+ISSUES = 100_000
+COMMENTS = 300_000
+
+# Tables that must never be read sequentially once they are large
+BIG_TABLES = re.compile(r"^(issues|issues_p\d+|comments|comments_\d{4}_\d{2}|comments_default)$")
+
+# name, url (formatted with the seeded ids), index expected in the plans (substring) or None
+CASES = [
+    ("issues_recent", "/api/issues?count=estimate", "ix_issues_updated_at"),
+    ("issues_by_status", "/api/issues?status_id={status}&count=estimate", "ix_issues_status_id_updated_at"),
+    ("issues_by_priority", "/api/issues?priority_id={priority}&count=estimate", "ix_issues_priority_id_updated_at"),
+    ("issues_by_author", "/api/issues?author_id={user}", "ix_issues_author_id_updated_at"),
+    ("issues_by_tag", "/api/issues?tags={tag}&count=estimate", None),
+    ("project_issues", "/api/projects/{project}/issues?count=estimate", "ix_issues_project_id_updated_at"),
+    ("project_issues_by_status", "/api/projects/{project}/issues?status_id={status}&count=estimate",
+     "ix_issues_project_id_status_id_updated_at"),
+    ("issues_author_facets", "/api/issues?author_id={user}&facets=status,priority,tag", None),
+    ("issue_detail", "/api/issues/{issue}", "issues_pkey"),
+    ("issue_comments", "/api/issues/{issue}/comments", "issue_id_created_at"),
+    ("comments_recent", "/api/comments?count=estimate", "updated_at"),
+    ("comments_by_author", "/api/comments?author_id={user}", "author_id"),
+    ("changes_feed", "/api/changes?since={since}", "ix_changes_txid_id"),
+    ("users_search", "/api/users?q=user12", "ix_users_lower_name"),
+]
+
+
+def seed():
+    if db.session.execute(text("SELECT EXISTS (SELECT 1 FROM issues)")).scalar():
+        sys.exit("Refusing to seed: the issues table is not empty (use a scratch database).")
+    print(f"Seeding {USERS} users, {PROJECTS} projects, {TAGS} tags, {ISSUES} issues and {COMMENTS} comments...")
+    # Comments span the last 45 days, so the previous two months need partitions too
+    _, skipped = ensure_future_partitions(1, months_back=2)
+    if skipped:
+        sys.exit(f"Could not create comment partitions: {skipped}")
+    for table, names in (("statuses", ["open", "in_progress", "review", "blocked", "closed"]),
+                         ("priorities", ["low", "medium", "high", "urgent"])):
+        for order, name in enumerate(names):
+            db.session.execute(text(
+                f"INSERT INTO {table} (name, display_order) VALUES (:name, :order) ON CONFLICT (name) DO NOTHING"
+            ), {"name": name, "order": order})
+    db.session.execute(text("""
+        INSERT INTO users (name, email, password_hash, role)
+        SELECT 'User ' || g, 'user' || g || '@example.com', '', CASE WHEN g = 1 THEN 'admin' ELSE 'user' END
+        FROM generate_series(1, :count) g
+    """), {"count": USERS})
+    db.session.execute(text("""
+        INSERT INTO projects (name, created_at)
+        SELECT 'Project ' || g, localtimestamp FROM generate_series(1, :count) g
+    """), {"count": PROJECTS})
+    db.session.execute(text("""
+        INSERT INTO tags (name, color, display_order)
+        SELECT 'tag-' || g, 'blue', g FROM generate_series(1, :count) g
+    """), {"count": TAGS})
+
+    ids = {table: db.session.execute(text(f"SELECT array_agg(id ORDER BY id) FROM {table}")).scalar()
+           for table in ("statuses", "priorities", "users", "tags", "projects")}
+    db.session.execute(text("""
+        INSERT INTO issues (project_id, title, description, status_id, priority_id, author_id, created_at, updated_at)
+        SELECT (:projects)[1 + mod(g * 3, cardinality(:projects))], 'Issue ' || g, 'Seeded issue number ' || g,
+               (:statuses)[1 + mod(g, cardinality(:statuses))],
+               (:priorities)[1 + mod(g * 7, cardinality(:priorities))],
+               (:users)[1 + mod(g * 13, cardinality(:users))],
+               localtimestamp - make_interval(mins => g),
+               localtimestamp - make_interval(mins => mod(g * 31, :count))
+        FROM generate_series(1, :count) g
+    """), {"statuses": ids["statuses"], "priorities": ids["priorities"], "users": ids["users"],
+           "projects": ids["projects"], "count": ISSUES})
+    db.session.execute(text("""
+        INSERT INTO issues_tags (issue_id, tag_id)
+        SELECT issues.id, (:tags)[1 + mod(issues.id * pick, cardinality(:tags))]
+        FROM issues, (VALUES (1), (7)) AS picks (pick)
+        ON CONFLICT DO NOTHING
+    """), {"tags": ids["tags"]})
+    db.session.execute(text("""
+        INSERT INTO comments (issue_id, author_id, content, created_at, updated_at)
+        SELECT issues.id, (:users)[1 + mod(g * 17, cardinality(:users))], 'Seeded comment ' || g,
+               localtimestamp - make_interval(mins => mod(g * 37, 60 * 24 * 45)),
+               localtimestamp - make_interval(mins => mod(g * 37, 60 * 24 * 45))
+        FROM generate_series(1, :count) g
+        JOIN issues ON issues.id = (SELECT min(id) FROM issues) + mod(g, :issues)
+    """), {"users": ids["users"], "count": COMMENTS, "issues": ISSUES})
+    index_partitions(3)
+    db.session.commit()
+    # The app writes the change log in small transactions, and feed pages end on transaction boundaries
+    first = db.session.execute(text("SELECT min(id) FROM issues")).scalar()
+    for low in range(first, first + ISSUES, 50):
+        db.session.execute(text("""
+            INSERT INTO changes (entity, entity_id, issue_id, op, changed_at)
+            SELECT 'issue', id, id, 'upsert', updated_at FROM issues WHERE id >= :low AND id < :low + 50
+        """), {"low": low})
+        db.session.commit()
+    with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("ANALYZE")
+
+
+def seeded_ids():
+    one = lambda sql: db.session.execute(text(sql)).scalar()
+    return {
+        "status": one("SELECT status_id FROM issues GROUP BY status_id ORDER BY count(*) DESC LIMIT 1"),
+        "priority": one("SELECT priority_id FROM issues GROUP BY priority_id ORDER BY count(*) DESC LIMIT 1"),
+        "project": one("SELECT project_id FROM issues GROUP BY project_id ORDER BY count(*) DESC LIMIT 1"),
+        "user": one("SELECT author_id FROM issues GROUP BY author_id ORDER BY count(*) DESC LIMIT 1"),
+        "tag": one("SELECT tag_id FROM issues_tags GROUP BY tag_id ORDER BY count(*) DESC LIMIT 1"),
+        "issue": one("SELECT issue_id FROM comments GROUP BY issue_id ORDER BY count(*) DESC LIMIT 1"),
+        "since": one("SELECT min(txid) FROM (SELECT DISTINCT txid FROM changes ORDER BY txid DESC LIMIT 3) recent"),
+        "admin": one("SELECT id FROM users WHERE role = 'admin' ORDER BY id LIMIT 1"),
+    }
+
+
+def capture_selects(app, url, headers):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = app.test_client().get(url, headers=headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {url} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    unique = []
+    for statement in statements:
+        if statement not in unique:
+            unique.append(statement)
+    return unique
+
+
+def explain(statement, parameters):
+    plan = db.session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+    return plan[0]["Plan"]
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", ()):
+        yield from walk(child)
+
+
+def normalize(name):
+    return re.sub(r"comments_\d{4}_\d{2}", "comments_YYYY_MM", name)
+
+
+def shape(node, depth=0):
+    """Plan tree without costs or row estimates; identical sibling subtrees
+    (one per comment partition) are listed once so new months don't show up."""
+    line = "  " * depth + node["Node Type"]
+    if "Relation Name" in node:
+        line += f" on {normalize(node['Relation Name'])}"
+    if "Index Name" in node:
+        line += f" using {normalize(node['Index Name'])}"
+    lines, seen = [line], []
+    for child in node.get("Plans", ()):
+        rendered = shape(child, depth + 1)
+        if rendered not in seen:
+            seen.append(rendered)
+            lines.extend(rendered)
+    return lines
+
+
+def table_rows():
+    return dict(db.session.execute(text(
+        "SELECT relname, reltuples::bigint FROM pg_class WHERE relkind IN ('r', 'p')"
+    )).all())
+
+
+def check_case(app, name, url, expected_index, headers, rows, max_seq_rows, update):
+    problems, snapshot = [], []
+    indexes = set()
+    for number, (statement, parameters) in enumerate(capture_selects(app, url, headers), 1):
+        plan = explain(statement, parameters)
+        snapshot.append(f"-- query {number}\n{statement.strip()}\n")
+        snapshot.extend(shape(plan))
+        snapshot.append("")
+        for node in walk(plan):
+            relation = node.get("Relation Name", "")
+            indexes.add(node.get("Index Name", ""))
+            if node["Node Type"] == "Seq Scan" and BIG_TABLES.match(relation) and rows.get(relation, 0) > max_seq_rows:
+                problems.append(f"query {number}: Seq Scan on {relation} ({rows[relation]} rows)")
+    if expected_index and not any(expected_index in index for index in indexes):
+        problems.append(f"expected index matching {expected_index!r} is not used")
+
+    text_snapshot = "\n".join(snapshot)
+    path = SNAPSHOT_DIR / f"{name}.txt"
+    if update or not path.exists():
+        SNAPSHOT_DIR.mkdir(exist_ok=True)
+        path.write_text(text_snapshot)
+    elif path.read_text() != text_snapshot:
+        problems.append(f"plan differs from {path.relative_to(SNAPSHOT_DIR.parent)} (rerun with --update to accept)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", action="store_true", help="seed an empty scratch database first")
+    parser.add_argument("--update", action="store_true", help="rewrite the plan snapshots")
+    parser.add_argument("--max-seq-rows", type=int, default=1000, help="largest table a Seq Scan may read")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            sys.exit("check_query_plans.py needs a Postgres DATABASE_URL.")
+        if args.seed:
+            seed()
+        ids = seeded_ids()
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(ids['admin']))}"}
+        rows = table_rows()
+
+        failures = 0
+        for name, url, expected_index in CASES:
+            problems = check_case(app, name, url.format(**ids), expected_index, headers, rows,
+                                  args.max_seq_rows, args.update)
+            print(f"{'FAIL' if problems else 'ok  '} {name}")
+            for problem in problems:
+                print(f"       {problem}")
+            failures += bool(problems)
+
+    print(f"{len(CASES) - failures}/{len(CASES)} cases passed")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""gunicorn settings, read from the working directory by `gunicorn run:app` (Procfile)."""
+import os
+
+# /api/stream holds its request open for as long as the client listens. With
+# the default sync workers every subscriber would pin a whole worker process,
+# so workers are threaded: a subscriber pins one thread, which waits on its
+# queue and holds no pooled database connection. Size the threads for the
+# expected subscribers per worker plus ordinary traffic.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+
+
+def post_worker_init(worker):
+    # Without --preload each worker imports the app itself, so this runs once
+    # per worker before it accepts requests
+    from app.tag_index import tag_index
+    tag_index.warm()
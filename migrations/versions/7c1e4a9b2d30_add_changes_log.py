@@ -0,0 +1,55 @@
+"""add changes log for delta sync
+
+Revision ID: 7c1e4a9b2d30
+Revises: 0bea779c5e23
+Create Date: 2026-10-19 10:12:41.108342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4a9b2d30'
+down_revision = '0bea779c5e23'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('changes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    # Writing transaction, also for raw SQL writers (seeding, manual fixes)
+    sa.Column('txid', sa.BigInteger(), server_default=sa.text('pg_current_xact_id()::text::bigint'), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('issue_id', sa.Integer(), nullable=True),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_changes_txid_id', 'changes', ['txid', 'id'], unique=False)
+    op.create_table('change_prunes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('txid', sa.BigInteger(), nullable=False),
+    sa.Column('removed', sa.Integer(), nullable=False),
+    sa.Column('pruned_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Seed the log with the existing rows so a client syncing from 0 gets
+    # everything; they share this transaction's txid and so come as one page
+    op.execute(
+        "INSERT INTO changes (entity, entity_id, issue_id, op, changed_at) "
+        "SELECT 'issue', id, id, 'upsert', COALESCE(updated_at, now()) FROM issues ORDER BY updated_at"
+    )
+    op.execute(
+        "INSERT INTO changes (entity, entity_id, issue_id, op, changed_at) "
+        "SELECT 'comment', id, issue_id, 'upsert', updated_at FROM comments ORDER BY updated_at"
+    )
+
+
+def downgrade():
+    op.drop_table('change_prunes')
+    op.drop_index('ix_changes_txid_id', table_name='changes')
+    op.drop_table('changes')
@@ -0,0 +1,69 @@
+"""add projects and scope issues and tags to them
+
+Revision ID: b3e6f9a2d417
+Revises: a7d4b2e9c183
+Create Date: 2026-10-19 15:10:37.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e6f9a2d417'
+down_revision = 'a7d4b2e9c183'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('projects',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    # Everything that exists so far becomes the Default project (DEFAULT_PROJECT_ID)
+    op.execute("INSERT INTO projects (id, name, created_at) VALUES (1, 'Default', CURRENT_TIMESTAMP)")
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("SELECT setval(pg_get_serial_sequence('projects', 'id'), 1)")
+
+    for table in ('issues', 'archived_issues'):
+        op.add_column(table, sa.Column('project_id', sa.Integer(), nullable=True))
+        op.execute(f"UPDATE {table} SET project_id = 1")
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('project_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key(batch_op.f(f'{table}_project_id_fkey'), 'projects', ['project_id'], ['id'])
+
+    # Existing tags stay shared (NULL) across projects
+    with op.batch_alter_table('tags', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('project_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(batch_op.f('tags_project_id_fkey'), 'projects', ['project_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index(batch_op.f('ix_tags_project_id'), ['project_id'], unique=False)
+
+    # Project-scoped lists filter on project_id first, so a project's page
+    # walks that project's slice of the index instead of the whole table
+    op.create_index('ix_issues_project_id_updated_at', 'issues', ['project_id', 'updated_at'], unique=False)
+    op.create_index('ix_issues_project_id_status_id_updated_at', 'issues', ['project_id', 'status_id', 'updated_at'], unique=False)
+    op.create_index('ix_issues_project_id_priority_id_updated_at', 'issues', ['project_id', 'priority_id', 'updated_at'], unique=False)
+    op.create_index('ix_archived_issues_project_id_updated_at', 'archived_issues', ['project_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_archived_issues_project_id_updated_at', table_name='archived_issues')
+    op.drop_index('ix_issues_project_id_priority_id_updated_at', table_name='issues')
+    op.drop_index('ix_issues_project_id_status_id_updated_at', table_name='issues')
+    op.drop_index('ix_issues_project_id_updated_at', table_name='issues')
+
+    with op.batch_alter_table('tags', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_tags_project_id'))
+        batch_op.drop_constraint(batch_op.f('tags_project_id_fkey'), type_='foreignkey')
+        batch_op.drop_column('project_id')
+
+    for table in ('archived_issues', 'issues'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint(batch_op.f(f'{table}_project_id_fkey'), type_='foreignkey')
+            batch_op.drop_column('project_id')
+
+    op.drop_table('projects')
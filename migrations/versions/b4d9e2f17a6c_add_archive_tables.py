@@ -0,0 +1,64 @@
+"""add archive tables for closed issues
+
+Revision ID: b4d9e2f17a6c
+Revises: 7c1e4a9b2d30
+Create Date: 2026-10-19 11:02:17.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d9e2f17a6c'
+down_revision = '7c1e4a9b2d30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('archived_issues',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('status_id', sa.Integer(), nullable=False),
+    sa.Column('priority_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['priority_id'], ['priorities.id'], ),
+    sa.ForeignKeyConstraint(['status_id'], ['statuses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('archived_comments',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('issue_id', sa.Integer(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['issue_id'], ['archived_issues.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('archived_comments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_archived_comments_issue_id'), ['issue_id'], unique=False)
+
+    op.create_table('archived_issues_tags',
+    sa.Column('issue_id', sa.Integer(), nullable=False),
+    sa.Column('tag_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['issue_id'], ['archived_issues.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['tag_id'], ['tags.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('issue_id', 'tag_id')
+    )
+
+
+def downgrade():
+    op.drop_table('archived_issues_tags')
+    with op.batch_alter_table('archived_comments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_archived_comments_issue_id'))
+
+    op.drop_table('archived_comments')
+    op.drop_table('archived_issues')
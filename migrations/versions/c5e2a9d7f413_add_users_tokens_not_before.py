@@ -0,0 +1,26 @@
+"""add users.tokens_not_before to revoke refresh tokens on password change
+
+Revision ID: c5e2a9d7f413
+Revises: e7b1d3f5a820
+Create Date: 2026-10-20 15:12:07.482195
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e2a9d7f413'
+down_revision = 'e7b1d3f5a820'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tokens_not_before', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('tokens_not_before')
@@ -0,0 +1,92 @@
+"""partition comments by month on created_at
+
+Revision ID: c8a1f5e3d942
+Revises: b4d9e2f17a6c
+Create Date: 2026-10-19 11:48:05.216730
+
+Postgres only. Rebuilds `comments` as a range-partitioned table with one
+partition per month of created_at plus a default partition. Future months
+and BRIN indexes for old months are maintained by `flask partition-comments`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8a1f5e3d942'
+down_revision = 'b4d9e2f17a6c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE comments RENAME TO comments_old")
+    op.execute("ALTER TABLE comments_old RENAME CONSTRAINT comments_pkey TO comments_old_pkey")
+
+    # The partition key has to be part of the primary key
+    op.execute("""
+        CREATE TABLE comments (
+            id integer NOT NULL DEFAULT nextval('comments_id_seq'),
+            issue_id integer REFERENCES issues (id) ON DELETE CASCADE,
+            content text NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            updated_at timestamp without time zone NOT NULL,
+            author_id integer REFERENCES users (id) ON DELETE CASCADE,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY comments.id")
+    op.execute("CREATE TABLE comments_default PARTITION OF comments DEFAULT")
+
+    # One partition per month from the oldest comment up to three months ahead
+    op.execute("""
+        DO $$
+        DECLARE
+            month date;
+        BEGIN
+            FOR month IN
+                SELECT generate_series(
+                    date_trunc('month', COALESCE((SELECT min(created_at) FROM comments_old), now())),
+                    date_trunc('month', now()) + interval '3 months',
+                    interval '1 month')::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF comments FOR VALUES FROM (%L) TO (%L)',
+                    'comments_' || to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date);
+            END LOOP;
+        END $$
+    """)
+
+    # Lookups by issue stay on a btree everywhere; updated_at btrees are
+    # per partition so old months can swap them for BRIN
+    op.execute("CREATE INDEX ix_comments_issue_id_created_at ON comments (issue_id, created_at)")
+    op.execute("CREATE INDEX ix_comments_author_id ON comments (author_id)")
+
+    op.execute("""
+        INSERT INTO comments (id, issue_id, content, created_at, updated_at, author_id)
+        SELECT id, issue_id, content, created_at, updated_at, author_id FROM comments_old
+    """)
+    op.execute("DROP TABLE comments_old")
+
+
+def downgrade():
+    op.execute("ALTER TABLE comments RENAME TO comments_partitioned")
+    # Free the key's name so the rebuilt table gets comments_pkey again
+    op.execute("ALTER TABLE comments_partitioned RENAME CONSTRAINT comments_pkey TO comments_partitioned_pkey")
+    op.create_table('comments',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('comments_id_seq')"), nullable=False),
+    sa.Column('issue_id', sa.Integer(), nullable=True),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['author_id'], ['users.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['issue_id'], ['issues.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name='comments_pkey')
+    )
+    op.execute("""
+        INSERT INTO comments (id, issue_id, content, created_at, updated_at, author_id)
+        SELECT id, issue_id, content, created_at, updated_at, author_id FROM comments_partitioned
+    """)
+    op.execute("ALTER SEQUENCE comments_id_seq OWNED BY comments.id")
+    op.execute("DROP TABLE comments_partitioned CASCADE")
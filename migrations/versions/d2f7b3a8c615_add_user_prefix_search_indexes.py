@@ -0,0 +1,27 @@
+"""add prefix search indexes on users name and email
+
+Revision ID: d2f7b3a8c615
+Revises: c8a1f5e3d942
+Create Date: 2026-10-19 12:21:39.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f7b3a8c615'
+down_revision = 'c8a1f5e3d942'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # text_pattern_ops lets lower(col) LIKE 'prefix%' use the btree whatever the collation
+    op.create_index('ix_users_lower_name', 'users', [sa.text('lower(name) text_pattern_ops')], unique=False)
+    op.create_index('ix_users_lower_email', 'users', [sa.text('lower(email) text_pattern_ops')], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_lower_email', table_name='users')
+    op.drop_index('ix_users_lower_name', table_name='users')
@@ -0,0 +1,34 @@
+"""add indexes for the issue list filters and ordering
+
+Revision ID: e5a9c7d1f3b8
+Revises: d2f7b3a8c615
+Create Date: 2026-10-19 13:05:12.481930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9c7d1f3b8'
+down_revision = 'd2f7b3a8c615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # get_issues pages by updated_at DESC, optionally under one equality filter
+    op.create_index('ix_issues_updated_at', 'issues', ['updated_at'], unique=False)
+    op.create_index('ix_issues_status_id_updated_at', 'issues', ['status_id', 'updated_at'], unique=False)
+    op.create_index('ix_issues_priority_id_updated_at', 'issues', ['priority_id', 'updated_at'], unique=False)
+    op.create_index('ix_issues_author_id_updated_at', 'issues', ['author_id', 'updated_at'], unique=False)
+    # The primary key leads with issue_id; tag filters and tag deletes look up by tag_id
+    op.create_index('ix_issues_tags_tag_id', 'issues_tags', ['tag_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_issues_tags_tag_id', table_name='issues_tags')
+    op.drop_index('ix_issues_author_id_updated_at', table_name='issues')
+    op.drop_index('ix_issues_priority_id_updated_at', table_name='issues')
+    op.drop_index('ix_issues_status_id_updated_at', table_name='issues')
+    op.drop_index('ix_issues_updated_at', table_name='issues')
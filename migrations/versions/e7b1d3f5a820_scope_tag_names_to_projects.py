@@ -0,0 +1,30 @@
+"""make tag names unique per project instead of globally
+
+Revision ID: e7b1d3f5a820
+Revises: b3e6f9a2d417
+Create Date: 2026-10-20 10:02:44.158337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b1d3f5a820'
+down_revision = 'b3e6f9a2d417'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tags', schema=None) as batch_op:
+        batch_op.drop_constraint('tags_name_key', type_='unique')
+    # NULLs never collide in a unique index, so shared tags are indexed as
+    # project 0 (project ids start at 1)
+    op.create_index('uq_tags_project_id_name', 'tags', [sa.text('coalesce(project_id, 0)'), 'name'], unique=True)
+
+
+def downgrade():
+    op.drop_index('uq_tags_project_id_name', table_name='tags')
+    with op.batch_alter_table('tags', schema=None) as batch_op:
+        batch_op.create_unique_constraint('tags_name_key', ['name'])
@@ -0,0 +1,44 @@
+"""add jobs table for background admin operations
+
+Revision ID: f1c3e8a6b279
+Revises: e5a9c7d1f3b8
+Create Date: 2026-10-19 13:41:27.650218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c3e8a6b279'
+down_revision = 'e5a9c7d1f3b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('checkpoint', sa.JSON(), nullable=True),
+    sa.Column('processed', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    # Workers claim the oldest queued job
+    op.create_index('ix_jobs_status_id', 'jobs', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_jobs_status_id', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+# TEST_DATABASE_URL=postgresql://... runs the Postgres-only tests too; the
+# database is emptied, so point it at a scratch one
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", "sqlite://")
+os.environ.setdefault("ISSUE_CACHE_BACKEND", "none")
+os.environ.setdefault("USER_CACHE_BACKEND", "none")
+# Every request is checked against its view's @query_budget and for N+1 shapes
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.models import Issue, Priority, Project, Status, Tag, User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def postgres(app):
+    if db.engine.dialect.name != "postgresql":
+        pytest.skip("needs TEST_DATABASE_URL pointing at Postgres")
+
+
+@pytest.fixture
+def data(app):
+    """A small tracker: one project, two statuses, a priority, an admin and a user, two tags."""
+    project = Project(name="Default")
+    open_, closed = Status(name="open", display_order=1), Status(name="closed", display_order=2)
+    high = Priority(name="high", display_order=1)
+    admin = User(name="Admin", email="admin@example.com", password_hash="", role="admin")
+    user = User(name="User", email="user@example.com", password_hash="")
+    bug, ui = Tag(name="bug", color="red", display_order=1), Tag(name="ui", color="blue", display_order=2)
+    db.session.add_all([project, open_, closed, high, admin, user, bug, ui])
+    db.session.commit()
+    app.config["DEFAULT_PROJECT_ID"] = project.id
+    return {"project": project.id, "open": open_.id, "closed": closed.id, "high": high.id,
+            "admin": admin.id, "user": user.id, "bug": bug.id, "ui": ui.id}
+
+
+@pytest.fixture
+def auth(app, data):
+    """Authorization headers for the admin (default) or any user id."""
+    def headers(user_id=None):
+        token = create_access_token(identity=str(user_id or data["admin"]))
+        return {"Authorization": f"Bearer {token}"}
+    return headers
+
+
+def make_issue(data, **fields):
+    issue = Issue(**{"title": "Issue", "project_id": data["project"], "status_id": data["open"],
+                     "priority_id": data["high"], "author_id": data["admin"], **fields})
+    db.session.add(issue)
+    db.session.commit()
+    return issue
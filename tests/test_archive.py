@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+
+from conftest import make_issue
+
+from app import db
+from app.archive import archive_issues
+from app.models import ArchivedComment, ArchivedIssue, ArchivedIssueTag, Comment, Issue, IssueTag, User
+
+
+def archived_issue(data):
+    issue = make_issue(data, title="Old", status_id=data["closed"], updated_at=datetime(2000, 1, 1))
+    db.session.add(Comment(issue_id=issue.id, author_id=data["user"], content="Archived with its issue"))
+    db.session.add(IssueTag(issue_id=issue.id, tag_id=data["bug"]))
+    db.session.commit()
+    issue_id = issue.id
+    assert archive_issues(data["closed"], datetime.now(timezone.utc)) == 1
+    return issue_id
+
+
+def test_comments_of_archived_issues_are_listed(client, data):
+    issue_id = archived_issue(data)
+    body = client.get(f"/api/issues/{issue_id}/comments").json
+    assert body["total_count"] == 1
+    assert [comment["content"] for comment in body["data"]] == ["Archived with its issue"]
+    assert client.get(f"/api/issues/{issue_id}/comments?author_name=Nobody").json["data"] == []
+
+
+def test_archived_issues_can_be_deleted(client, data, auth):
+    issue_id = archived_issue(data)
+    assert client.delete(f"/api/issues/{issue_id}", headers=auth(data["user"])).status_code == 403
+
+    assert client.delete(f"/api/issues/{issue_id}", headers=auth()).status_code == 204
+    assert client.get(f"/api/issues/{issue_id}").status_code == 404
+    assert ArchivedIssue.query.count() == ArchivedComment.query.count() == ArchivedIssueTag.query.count() == 0
+    assert client.delete(f"/api/issues/{issue_id}", headers=auth()).status_code == 404
+
+
+def test_reopening_an_archived_issue_restores_it(client, data, auth):
+    issue_id = archived_issue(data)
+    response = client.put(f"/api/issues/{issue_id}", json={"status_id": data["open"]}, headers=auth())
+    assert response.status_code == 200 and response.json["status"]["id"] == data["open"]
+    assert ArchivedIssue.query.count() == ArchivedComment.query.count() == ArchivedIssueTag.query.count() == 0
+    assert [comment.content for comment in Comment.query] == ["Archived with its issue"]
+    assert [link.tag_id for link in IssueTag.query] == [data["bug"]]
+
+
+def test_comments_on_archived_issues_can_be_edited_and_deleted(client, data, auth):
+    issue_id = archived_issue(data)
+    comment_id = ArchivedComment.query.one().id
+    other = User(name="Other", email="other@example.com", password_hash="")
+    db.session.add(other)
+    db.session.commit()
+    # Refused without moving the issue back
+    assert client.put(f"/api/comments/{comment_id}", json={"content": "x"}, headers=auth(other.id)).status_code == 403
+    assert ArchivedIssue.query.count() == 1
+
+    response = client.put(f"/api/comments/{comment_id}", json={"content": "Edited"}, headers=auth(data["user"]))
+    assert response.status_code == 200 and response.json["content"] == "Edited"
+    assert ArchivedIssue.query.count() == 0 and db.session.get(Issue, issue_id) is not None
+
+    db.session.get(Issue, issue_id).updated_at = datetime(2000, 1, 1)
+    db.session.commit()
+    assert archive_issues(data["closed"], datetime.now(timezone.utc)) == 1
+    assert client.delete(f"/api/comments/{comment_id}", headers=auth(data["user"])).status_code == 204
+    assert ArchivedIssue.query.count() == ArchivedComment.query.count() == Comment.query.count() == 0
+    assert db.session.get(Issue, issue_id) is not None
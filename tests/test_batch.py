@@ -0,0 +1,66 @@
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from app import db
+from app.batch import _workers
+
+
+def batch(client, paths, **options):
+    response = client.post("/api/batch", json={"requests": paths, **options})
+    assert response.status_code == 200
+    return [(item["status"], item["body"]) for item in response.json["responses"]]
+
+
+def test_sub_requests_go_through_the_request_hooks(app, client, data):
+    calls = []
+    app.before_request(lambda: calls.append("before"))
+    app.teardown_request(lambda error: calls.append("teardown"))
+
+    results = batch(client, ["/api/statuses", "/api/projects/999/issues", "/api/stream"])
+    assert [status for status, _ in results] == [200, 404, 400]
+    assert [status["name"] for status in results[0][1]] == ["open", "closed"]
+    # Error handlers render the API's error body, not an HTML page
+    assert "error" in results[1][1]
+    # The batch request around two dispatched sub-requests and a refused one
+    assert calls == ["before", "before", "teardown", "before", "teardown", "teardown", "teardown"]
+
+
+def test_parallel_sub_requests(client, data):
+    results = batch(client, ["/api/statuses", "/api/priorities"], parallel=True)
+    assert [status for status, _ in results] == [200, 200]
+    assert results[1][1][0]["name"] == "high"
+
+
+def test_parallel_batches_stay_within_the_connection_pool(app, client, data, postgres, monkeypatch):
+    small = QueuePool(db.engine.pool._creator, pool_size=3, max_overflow=0, timeout=5)
+    monkeypatch.setattr(db.engine, "pool", small)
+    app.config["BATCH_MAX_WORKERS"] = 8
+    checked_out, peak = [0], [0]
+
+    def checkout(*args):
+        checked_out[0] += 1
+        peak[0] = max(peak[0], checked_out[0])
+
+    def checkin(*args):
+        checked_out[0] -= 1
+
+    event.listen(small, "checkout", checkout)
+    event.listen(small, "checkin", checkin)
+    try:
+        assert _workers(app) == 2
+        results = batch(client, ["/api/statuses", "/api/priorities", "/api/tags"] * 4, parallel=True)
+        assert [status for status, _ in results] == [200] * 12
+        assert peak[0] <= 2
+    finally:
+        small.dispose()
+
+
+def test_parallel_falls_back_to_serial_without_room_in_the_pool(app, client, data, postgres, monkeypatch):
+    small = QueuePool(db.engine.pool._creator, pool_size=1, max_overflow=0, timeout=5)
+    monkeypatch.setattr(db.engine, "pool", small)
+    try:
+        assert _workers(app) == 0
+        results = batch(client, ["/api/statuses"] * 3, parallel=True)
+        assert [status for status, _ in results] == [200] * 3
+    finally:
+        small.dispose()
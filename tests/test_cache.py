@@ -0,0 +1,46 @@
+import pytest
+from conftest import make_issue
+
+from app import db
+from app.cache import issue_cache
+from app.models import IssueTag
+
+
+@pytest.fixture
+def cached(app):
+    app.config["ISSUE_CACHE_BACKEND"] = "lru"
+    issue_cache.init_app(app)
+    yield
+    app.config["ISSUE_CACHE_BACKEND"] = "none"
+    issue_cache.init_app(app)
+
+
+def tag_names(client):
+    response = client.get("/api/issues")
+    return response.headers["X-Cache"], [tag["name"] for tag in response.json["data"][0]["tags"]]
+
+
+def test_renaming_a_tag_invalidates_cached_issue_pages(client, data, auth, cached):
+    issue = make_issue(data)
+    db.session.add(IssueTag(issue_id=issue.id, tag_id=data["bug"]))
+    db.session.commit()
+    assert tag_names(client) == ("MISS", ["bug"])
+    assert tag_names(client) == ("HIT", ["bug"])
+
+    assert client.put(f"/api/tags/{data['bug']}", json={"name": "defect"}, headers=auth()).status_code == 200
+    assert tag_names(client) == ("MISS", ["defect"])
+
+
+def test_lookup_writes_bump_the_generation(client, data, auth, cached):
+    writes = [
+        ("put", f"/api/statuses/{data['open']}", {"name": "new"}),
+        ("put", f"/api/priorities/{data['high']}", {"name": "urgent"}),
+        ("put", "/api/statuses/order", {"order": [data["closed"], data["open"]]}),
+        ("put", "/api/tags/order", {"order": [data["ui"], data["bug"]], "project_id": data["project"]}),
+        ("delete", f"/api/tags/{data['ui']}", None),
+    ]
+    for method, url, body in writes:
+        generation = issue_cache.backend.generation()
+        response = getattr(client, method)(url, json=body, headers=auth())
+        assert response.status_code in (200, 204), url
+        assert issue_cache.backend.generation() > generation, url
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+from conftest import make_issue
+
+from app import db
+from app.archive import archive_issues
+from app.changes import prune_changes
+from app.models import Change, Comment
+
+
+def tombstone(entity_id):
+    return Change.__table__.insert().values(entity="issue", entity_id=entity_id, issue_id=entity_id, op="delete",
+                                            changed_at=datetime.now(timezone.utc))
+
+
+def test_feed_returns_writes_and_a_token_to_resume_from(client, data):
+    issue = make_issue(data, title="First")
+    body = client.get("/api/changes?since=0").json
+    assert [(c["type"], c["op"], c["id"]) for c in body["changes"]] == [("issue", "upsert", issue.id)]
+    assert body["next_since"] == body["changes"][-1]["token"] > 0
+
+    again = client.get(f"/api/changes?since={body['next_since']}").json
+    assert again["changes"] == [] and again["next_since"] == body["next_since"]
+
+
+def test_pruned_tokens_must_resync(client, data):
+    make_issue(data, title="Old")
+    old_token = client.get("/api/changes?since=0").json["next_since"]
+    db.session.execute(Change.__table__.update().values(changed_at=datetime(2000, 1, 1)))
+    db.session.commit()
+    make_issue(data, title="New")
+
+    assert prune_changes(datetime.now(timezone.utc) - timedelta(days=1)) == 1
+    response = client.get("/api/changes?since=0")
+    assert response.status_code == 410 and response.json["resync"] is True
+    body = client.get(f"/api/changes?since={old_token}").json
+    assert [c["data"]["title"] for c in body["changes"]] == ["New"]
+
+
+def test_archiving_logs_comment_tombstones(client, data):
+    issue = make_issue(data, status_id=data["closed"], updated_at=datetime(2000, 1, 1))
+    db.session.add(Comment(issue_id=issue.id, author_id=data["user"], content="Archived with its issue"))
+    db.session.commit()
+    token = client.get("/api/changes?since=0").json["next_since"]
+
+    assert archive_issues(data["closed"], datetime.now(timezone.utc)) == 1
+    changes = client.get(f"/api/changes?since={token}").json["changes"]
+    assert {(c["type"], c["op"]) for c in changes} == {("comment", "delete"), ("issue", "delete")}
+
+
+def test_change_committed_after_a_higher_one_is_not_skipped(client, data, postgres):
+    # The first transaction takes the lower id and txid but commits last
+    early = db.engine.connect()
+    transaction = early.begin()
+    early.execute(tombstone(101))
+    with db.engine.begin() as late:
+        late.execute(tombstone(102))
+
+    body = client.get("/api/changes?since=0").json
+    assert body["changes"] == []
+
+    transaction.commit()
+    early.close()
+    body = client.get(f"/api/changes?since={body['next_since']}").json
+    assert [c["id"] for c in body["changes"]] == [101, 102]
+
+
+def test_pages_end_on_transaction_boundaries(client, data, postgres):
+    with db.engine.begin() as conn:
+        for entity_id in (1, 2, 3):
+            conn.execute(tombstone(entity_id))
+    with db.engine.begin() as conn:
+        conn.execute(tombstone(4))
+
+    body = client.get("/api/changes?since=0&limit=2").json
+    assert [c["id"] for c in body["changes"]] == [1, 2, 3] and body["has_more"]
+    body = client.get(f"/api/changes?since={body['next_since']}&limit=2").json
+    assert [c["id"] for c in body["changes"]] == [4] and not body["has_more"]
@@ -0,0 +1,29 @@
+import gzip
+import json
+
+
+def get(client, url, encoding="gzip"):
+    return client.get(url, headers={"Accept-Encoding": encoding} if encoding else {})
+
+
+def test_large_responses_are_gzipped(app, client, data):
+    app.config["COMPRESS_MIN_SIZE"] = 10
+    plain = get(client, "/api/statuses", encoding=None)
+    assert "Content-Encoding" not in plain.headers and "Accept-Encoding" in plain.vary
+
+    response = get(client, "/api/statuses")
+    assert response.headers["Content-Encoding"] == "gzip" and "Accept-Encoding" in response.vary
+    assert json.loads(gzip.decompress(response.get_data())) == plain.json
+
+
+def test_small_error_and_disabled_responses_are_left_alone(app, client, data):
+    app.config["COMPRESS_MIN_SIZE"] = 10_000
+    assert "Content-Encoding" not in get(client, "/api/statuses").headers
+
+    app.config["COMPRESS_MIN_SIZE"] = 10
+    missing = get(client, "/api/projects/999/issues")
+    assert missing.status_code == 404 and "Content-Encoding" not in missing.headers
+    assert "Content-Encoding" not in get(client, "/api/statuses", encoding="identity").headers
+
+    app.config["COMPRESS_ENABLED"] = False
+    assert "Content-Encoding" not in get(client, "/api/statuses").headers
@@ -0,0 +1,32 @@
+from conftest import make_issue
+
+from app import db
+from app.models import Comment
+
+
+def test_count_none_skips_the_total(client, data, auth):
+    issue = make_issue(data)
+    db.session.add(Comment(issue_id=issue.id, author_id=data["user"], content="Hi"))
+    db.session.commit()
+    for url in ("/api/issues", "/api/comments", f"/api/issues/{issue.id}/comments"):
+        body = client.get(f"{url}?count=none", headers=auth()).json
+        assert (body["total_count"], body["count_mode"], len(body["data"])) == (None, "none", 1), url
+        body = client.get(f"{url}?count=bogus", headers=auth()).json
+        assert (body["total_count"], body["count_mode"]) == (1, "exact"), url
+
+
+def test_small_estimates_fall_back_to_an_exact_count(client, data):
+    for _ in range(3):
+        make_issue(data)
+    body = client.get("/api/issues?count=estimate").json
+    assert (body["total_count"], body["count_mode"]) == (3, "exact")
+
+
+def test_large_results_use_the_planner_estimate(app, client, data, postgres):
+    for _ in range(3):
+        make_issue(data)
+    db.session.execute(db.text("ANALYZE issues"))
+    db.session.commit()
+    app.config["COUNT_ESTIMATE_THRESHOLD"] = 1
+    body = client.get("/api/issues?count=estimate").json
+    assert body["count_mode"] == "estimate" and body["total_count"] >= 1
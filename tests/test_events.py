@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+
+from conftest import make_issue
+
+from app import db
+from app.archive import archive_issues
+from app.changes import log_changes
+from app.events import broker, matches
+from app.models import Comment
+
+
+def drain(subscription):
+    events = []
+    while not subscription.empty():
+        events.append(subscription.get_nowait())
+    return events
+
+
+def test_bulk_writes_publish_events_on_commit(app, data):
+    issue = make_issue(data, status_id=data["closed"], updated_at=datetime(2000, 1, 1))
+    db.session.add(Comment(issue_id=issue.id, author_id=data["user"], content="Goes too"))
+    db.session.commit()
+    issue_id, comment_id = issue.id, Comment.query.one().id
+    subscription = broker.subscribe()
+    try:
+        assert archive_issues(data["closed"], datetime.now(timezone.utc)) == 1
+        assert drain(subscription) == [
+            {"type": "comment", "op": "delete", "id": comment_id, "issue_id": issue_id},
+            {"type": "issue", "op": "delete", "id": issue_id, "issue_id": issue_id},
+        ]
+
+        # Nothing is published for a write that rolls back
+        log_changes(db.session, [(("issue", issue_id, issue_id), "upsert")])
+        db.session.rollback()
+        db.session.commit()
+        assert drain(subscription) == []
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def test_bulk_write_events_match_attribute_filters(app, data):
+    issue = make_issue(data)
+    subscription = broker.subscribe()
+    try:
+        issue.title = "Renamed"
+        db.session.commit()
+        log_changes(db.session, [(("issue", issue.id, issue.id), "upsert")])
+        db.session.commit()
+        orm_event, core_event = drain(subscription)
+    finally:
+        broker.unsubscribe(subscription)
+
+    # A bulk write doesn't know the issue's attributes, so it can't rule a subscriber out
+    other_status = {"status_id": data["closed"]}
+    assert orm_event["status_id"] == data["open"] and not matches(orm_event, other_status)
+    assert "status_id" not in core_event and matches(core_event, other_status)
+    assert not matches(core_event, {"issue_id": issue.id + 1})
@@ -0,0 +1,37 @@
+from conftest import make_issue
+
+from app import db
+from app.models import IssueTag, Priority
+
+
+def seed(data):
+    low = Priority(name="low", display_order=2)
+    db.session.add(low)
+    db.session.commit()
+    first, second = make_issue(data), make_issue(data, priority_id=low.id)
+    third = make_issue(data, status_id=data["closed"])
+    db.session.add_all([IssueTag(issue_id=first.id, tag_id=data["bug"]), IssueTag(issue_id=second.id, tag_id=data["bug"]),
+                        IssueTag(issue_id=third.id, tag_id=data["ui"])])
+    db.session.commit()
+    return low.id
+
+
+def test_facets_count_every_matching_issue(client, data):
+    low = seed(data)
+    body = client.get("/api/issues?limit=1&facets=status,priority,tag,bogus").json
+    assert len(body["data"]) == 1
+    assert body["facets"] == {
+        "status": [{"id": data["open"], "count": 2}, {"id": data["closed"], "count": 1}],
+        "priority": [{"id": data["high"], "count": 2}, {"id": low, "count": 1}],
+        "tag": [{"id": data["bug"], "count": 2}, {"id": data["ui"], "count": 1}],
+    }
+    assert "facets" not in client.get("/api/issues").json
+
+
+def test_facets_follow_the_list_filters(client, data):
+    seed(data)
+    body = client.get(f"/api/issues?status_id={data['open']}&facets=status,tag").json
+    assert body["facets"] == {"status": [{"id": data["open"], "count": 2}], "tag": [{"id": data["bug"], "count": 2}]}
+
+    body = client.get(f"/api/issues?tags={data['ui']}&facets=tag,priority").json
+    assert body["facets"] == {"tag": [{"id": data["ui"], "count": 1}], "priority": [{"id": data["high"], "count": 1}]}
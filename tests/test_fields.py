@@ -0,0 +1,42 @@
+from conftest import make_issue
+from sqlalchemy import event
+
+from app import db
+from app.models import Comment
+
+
+def statements(client, url):
+    seen = []
+    listener = lambda conn, cursor, statement, *args: seen.append(statement)
+    event.listen(db.engine, "before_cursor_execute", listener)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", listener)
+    return response, seen
+
+
+def test_issue_fields_prune_the_response_and_the_sql(client, data):
+    make_issue(data, title="Pruned", description="Not fetched")
+    response, full = statements(client, "/api/issues")
+    assert {"description", "status", "tags", "comment_count"} <= set(response.json["data"][0])
+
+    response, pruned = statements(client, "/api/issues?fields=title,bogus")
+    # Unknown names are ignored and id always comes along
+    assert response.json["data"] == [{"id": response.json["data"][0]["id"], "title": "Pruned"}]
+    assert len(pruned) < len(full)
+    page = [sql for sql in pruned if "ORDER BY" in sql]
+    assert len(page) == 1 and "description" not in page[0] and "JOIN" not in page[0]
+
+
+def test_comment_fields(client, data):
+    issue = make_issue(data)
+    db.session.add(Comment(issue_id=issue.id, author_id=data["user"], content="Hello"))
+    db.session.commit()
+    response, pruned = statements(client, f"/api/issues/{issue.id}/comments?fields=author")
+    assert response.json["data"] == [{"id": response.json["data"][0]["id"], "author": {"id": data["user"], "name": "User"}}]
+    page = [sql for sql in pruned if "ORDER BY" in sql]
+    assert len(page) == 1 and "comments.content" not in page[0] and "JOIN users" in page[0]
+
+    everything = client.get(f"/api/issues/{issue.id}/comments?fields=").json["data"][0]
+    assert everything["content"] == "Hello" and "created_at" in everything
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from app import db, health
+from app.health import readiness
+
+
+@pytest.fixture
+def probe(app):
+    """/readyz against a database stamped at the migration head, with a fresh result cache."""
+    db.session.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+    for head in readiness.heads:
+        db.session.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+    db.session.commit()
+    app.config["READYZ_CACHE_SECONDS"] = 0
+    readiness._result = None
+    yield
+    readiness._result = None
+    db.session.execute(text("DROP TABLE alembic_version"))
+    db.session.commit()
+
+
+def test_healthz_never_needs_the_database(client):
+    assert client.get("/healthz").json == {"status": "ok"}
+
+
+def test_ready_at_the_migration_head(client, probe):
+    response = client.get("/readyz")
+    assert response.status_code == 200 and response.json["ready"] is True
+    assert response.json["checks"]["migrations"]["current"] == sorted(readiness.heads)
+
+    db.session.execute(text("UPDATE alembic_version SET version_num = 'old'"))
+    db.session.commit()
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json["checks"]["migrations"] == {"ok": False, "expected": sorted(readiness.heads), "current": ["old"]}
+
+
+def test_results_are_cached(app, client, probe):
+    app.config["READYZ_CACHE_SECONDS"] = 60
+    assert client.get("/readyz").status_code == 200
+    db.session.execute(text("DELETE FROM alembic_version"))
+    db.session.commit()
+    assert client.get("/readyz").status_code == 200
+
+    readiness._result = None
+    assert client.get("/readyz").status_code == 503
+
+
+def test_a_slow_database_times_out_without_stacking_probes(app, client, probe, monkeypatch):
+    release, calls = threading.Event(), []
+    def hung(engine, timeout_ms):
+        calls.append(1)
+        release.wait(5)
+        return set(readiness.heads)
+    monkeypatch.setattr(health, "_database_revisions", hung)
+    app.config["READYZ_TIMEOUT_MS"] = 50
+    try:
+        for _ in range(2):
+            response = client.get("/readyz")
+            assert response.status_code == 503
+            assert response.json["checks"]["database"] == {"ok": False, "error": "timeout"}
+        # The second probe found the first still running instead of starting another
+        assert len(calls) == 1
+    finally:
+        release.set()
+        readiness._pending.result(5)
+
+
+def test_a_saturated_pool_is_not_ready(client, probe, monkeypatch):
+    monkeypatch.setattr(health, "pool_usage", lambda pool: (15, 15))
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json["checks"]["pool"] == {"ok": False, "checked_out": 15, "capacity": 15}
+    assert response.json["checks"]["database"] == {"ok": False, "error": "pool saturated"}
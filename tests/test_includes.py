@@ -0,0 +1,39 @@
+from datetime import datetime, timezone
+
+from conftest import make_issue
+
+from app import db
+from app.archive import archive_issues
+from app.models import Comment
+
+
+def add_comments(data, issue_id, count):
+    for day in range(1, count + 1):
+        db.session.add(Comment(issue_id=issue_id, author_id=data["user"], content=f"Comment {day}",
+                               created_at=datetime(2020, 1, day), updated_at=datetime(2020, 1, day)))
+    db.session.commit()
+
+
+def test_include_comments_embeds_the_newest_page(client, data):
+    issue_id = make_issue(data).id
+    add_comments(data, issue_id, 3)
+    assert "comments" not in client.get(f"/api/issues/{issue_id}").json
+
+    body = client.get(f"/api/issues/{issue_id}?include=comments&comments_limit=2").json
+    assert body["comment_count"] == 3
+    assert [comment["content"] for comment in body["comments"]] == ["Comment 3", "Comment 2"]
+    assert not {"author", "issue"} & set(body["comments"][0])
+
+    body = client.get(f"/api/issues/{issue_id}?include=comments,author,bogus").json
+    assert len(body["comments"]) == 3
+    assert body["comments"][0]["author"] == {"id": data["user"], "name": "User"}
+
+
+def test_include_comments_on_an_archived_issue(client, data):
+    issue_id = make_issue(data, status_id=data["closed"], updated_at=datetime(2000, 1, 1)).id
+    add_comments(data, issue_id, 2)
+    assert archive_issues(data["closed"], datetime.now(timezone.utc)) == 1
+
+    body = client.get(f"/api/issues/{issue_id}?include=comments").json
+    assert body["archived"] is True
+    assert [comment["content"] for comment in body["comments"]] == ["Comment 2", "Comment 1"]
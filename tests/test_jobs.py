@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
+from conftest import make_issue
+
+from app import db
+from app.jobs import KINDS, claim_job, reassign_issues_step, run_job
+from app.models import ArchivedIssue, Issue, Job, Status
+
+
+def test_job_kind_must_be_a_string(client, data, auth):
+    for kind in (["delete_tag"], {"name": "delete_tag"}, None):
+        response = client.post("/api/jobs", json={"kind": kind, "params": {"tag_id": data["bug"]}}, headers=auth())
+        assert response.status_code == 400 and response.json["error"] == "kind must be a string."
+
+    response = client.post("/api/jobs", json={"kind": "delete_tag", "params": {"tag_id": data["bug"]}}, headers=auth())
+    assert response.status_code == 202 and response.json["status"] == "queued"
+
+
+def reassign_job(data, auth, client):
+    response = client.post("/api/jobs", headers=auth(), json={
+        "kind": "reassign_issues",
+        "params": {"field": "status", "from_id": data["open"], "to_id": data["closed"], "delete_after": True},
+    })
+    assert response.status_code == 202
+    return response.json["id"]
+
+
+def test_reassign_resumes_from_its_checkpoint_after_a_failure(client, data, auth, monkeypatch):
+    ids = [make_issue(data).id for _ in range(5)]
+    job_id = reassign_job(data, auth, client)
+    spec = KINDS["reassign_issues"]
+    step, calls = spec.step, []
+
+    def failing_step(params, checkpoint, chunk_size):
+        calls.append(checkpoint)
+        if len(calls) == 2:
+            raise RuntimeError("worker died")
+        return step(params, checkpoint, chunk_size)
+
+    monkeypatch.setattr(spec, "step", failing_step)
+    job = run_job(claim_job(stale_after=60), chunk_size=2, max_attempts=3)
+    assert (job.status, job.processed, job.checkpoint) == ("queued", 2, {"phase": 0, "last_id": ids[1]})
+    assert "worker died" in job.error
+
+    job = run_job(claim_job(stale_after=60), chunk_size=2, max_attempts=3)
+    assert (job.id, job.status, job.processed, job.attempts) == (job_id, "done", 5, 2)
+    # Resumed after the first chunk instead of starting over
+    assert calls[2] == {"phase": 0, "last_id": ids[1]}
+    assert {issue.status_id for issue in Issue.query} == {data["closed"]}
+    assert db.session.get(Status, data["open"]) is None
+
+
+def test_reassign_picks_up_rows_moved_behind_the_checkpoint(app, data):
+    first, second = make_issue(data), make_issue(data, status_id=data["closed"])
+    params = {"field": "status", "from_id": data["open"], "to_id": data["closed"]}
+    checkpoint, processed, _ = reassign_issues_step(params, None, 1)
+    assert (checkpoint, processed) == ({"phase": 0, "last_id": first.id}, 1)
+    db.session.commit()
+
+    second.status_id = data["open"]
+    db.session.commit()
+    second_id = second.id
+    checkpoint, processed, _ = reassign_issues_step(params, checkpoint, 1)
+    assert (checkpoint, processed) == ({"phase": 0, "last_id": second_id}, 1)
+    # The full pass that ends the phase finds nothing left
+    assert reassign_issues_step(params, checkpoint, 1)[:2] == ({"phase": 0}, 0)
+    assert reassign_issues_step(params, {"phase": 0}, 1)[:2] == ({"phase": 1}, 0)
+
+
+def test_archived_phase_invalidates_the_issue_cache(app, data):
+    db.session.add(ArchivedIssue(id=1000, title="Old", description="", project_id=data["project"], status_id=data["open"],
+                                 priority_id=data["high"], author_id=data["admin"]))
+    db.session.commit()
+    params = {"field": "status", "from_id": data["open"], "to_id": data["closed"]}
+    reassign_issues_step(params, {"phase": 1}, 10)
+    assert db.session.info.get("issues_written")
+    db.session.commit()
+    assert ArchivedIssue.query.one().status_id == data["closed"]
+
+
+def test_stale_running_jobs_are_reclaimed(client, data, auth):
+    stale_id, fresh_id = reassign_job(data, auth, client), reassign_job(data, auth, client)
+    now = datetime.now(timezone.utc)
+    for job_id, heartbeat in ((stale_id, now - timedelta(minutes=10)), (fresh_id, now)):
+        job = db.session.get(Job, job_id)
+        job.status, job.attempts, job.heartbeat_at = "running", 1, heartbeat
+    db.session.commit()
+
+    job = claim_job(stale_after=60)
+    assert (job.id, job.status, job.attempts) == (stale_id, "running", 2)
+    assert claim_job(stale_after=60) is None
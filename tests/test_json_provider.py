@@ -0,0 +1,34 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app import json_provider
+from app.json_provider import OrjsonJSONProvider, StdlibJSONProvider, select_json_provider
+
+PAYLOAD = {"when": datetime(2026, 1, 2, 3, 4, 5), "day": datetime(2026, 1, 2).date(), "counts": {1: 2}, "text": "é"}
+EXPECTED = {"when": "2026-01-02T03:04:05", "day": "2026-01-02", "counts": {"1": 2}, "text": "é"}
+
+
+@pytest.mark.parametrize("provider", [StdlibJSONProvider, OrjsonJSONProvider])
+def test_providers_encode_the_same_payload(app, provider):
+    if provider is OrjsonJSONProvider:
+        pytest.importorskip("orjson")
+    app.json = provider(app)
+    with app.test_request_context():
+        response = app.json.response(PAYLOAD)
+    assert response.mimetype == "application/json"
+    assert json.loads(response.get_data()) == EXPECTED
+    assert app.json.loads(app.json.dumps(PAYLOAD)) == EXPECTED
+
+
+def test_provider_selection(app, monkeypatch):
+    app.config["JSON_PROVIDER"] = "stdlib"
+    assert isinstance(select_json_provider(app), StdlibJSONProvider)
+
+    monkeypatch.setattr(json_provider, "orjson", None)
+    app.config["JSON_PROVIDER"] = "auto"
+    assert isinstance(select_json_provider(app), StdlibJSONProvider)
+    app.config["JSON_PROVIDER"] = "orjson"
+    with pytest.raises(RuntimeError, match="orjson is not installed"):
+        select_json_provider(app)
@@ -0,0 +1,17 @@
+import pytest
+
+
+def test_http_errors_are_json_for_json_clients(client, data):
+    response = client.get("/api/projects/999/issues")
+    assert response.status_code == 404 and response.mimetype == "application/json"
+    assert "error" in response.json
+
+    response = client.delete("/api/projects")
+    assert response.status_code == 405 and "GET" in response.headers["Allow"]
+
+
+def test_http_errors_are_msgpack_for_msgpack_clients(client, data):
+    msgpack = pytest.importorskip("msgpack")
+    response = client.get("/api/projects/999/issues", headers={"Accept": "application/msgpack"})
+    assert response.status_code == 404 and response.mimetype == "application/msgpack"
+    assert "error" in msgpack.unpackb(response.data)
@@ -0,0 +1,62 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from app import db
+from app.partitions import _add_months, comment_partitions, ensure_future_partitions
+
+
+def partition_comments():
+    """Rebuild the test database's comments table the way migration c8a1f5e3d942 does, without month partitions."""
+    db.session.execute(text("DROP TABLE comments"))
+    db.session.execute(text("""
+        CREATE TABLE comments (
+            id serial,
+            issue_id integer REFERENCES issues (id) ON DELETE CASCADE,
+            content text NOT NULL,
+            created_at timestamp without time zone NOT NULL,
+            updated_at timestamp without time zone NOT NULL,
+            author_id integer REFERENCES users (id) ON DELETE CASCADE,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """))
+    db.session.execute(text("CREATE TABLE comments_default PARTITION OF comments DEFAULT"))
+    db.session.commit()
+
+
+def test_rows_in_the_default_partition_move_into_the_new_month(postgres, data):
+    partition_comments()
+    next_month = _add_months(date.today().replace(day=1), 1)
+    db.session.execute(text(
+        "INSERT INTO comments (content, created_at, updated_at) VALUES ('early', :at, :at), ('later', :later, :later)"
+    ), {"at": next_month.replace(day=2), "later": _add_months(next_month, 6)})
+    db.session.commit()
+
+    created, skipped = ensure_future_partitions(2)
+    db.session.commit()
+
+    assert skipped == [] and len(created) == 3
+    assert set(comment_partitions()) == {_add_months(next_month, offset) for offset in (-1, 0, 1)}
+    placed = dict(db.session.execute(text("SELECT content, tableoid::regclass::text FROM comments")).all())
+    assert placed == {"early": f"comments_{next_month:%Y_%m}", "later": "comments_default"}
+
+
+def test_a_month_that_fails_is_reported_without_undoing_the_others(postgres, data):
+    partition_comments()
+    this_month = date.today().replace(day=1)
+    # A stray table holding the name of this month's partition
+    db.session.execute(text(f"CREATE TABLE comments_{this_month:%Y_%m} (id integer)"))
+    db.session.commit()
+
+    try:
+        created, skipped = ensure_future_partitions(1)
+        db.session.commit()
+
+        assert created == [f"comments_{_add_months(this_month, 1):%Y_%m}"]
+        assert [name for name, _ in skipped] == [f"comments_{this_month:%Y_%m}"]
+        assert "already exists" in skipped[0][1]
+        assert set(comment_partitions()) == {_add_months(this_month, 1)}
+    finally:
+        db.session.rollback()
+        db.session.execute(text(f"DROP TABLE comments_{this_month:%Y_%m}"))
+        db.session.commit()
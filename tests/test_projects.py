@@ -0,0 +1,94 @@
+import pytest
+from conftest import make_issue
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Comment, IssueTag, Project, Tag
+from app.partitions import issues_partitioned, partition_issues, unpartition_issues
+
+
+def add_project(name):
+    project = Project(name=name)
+    db.session.add(project)
+    db.session.commit()
+    return project.id
+
+
+def test_tag_names_are_unique_per_project(client, data, auth):
+    mobile, web = add_project("Mobile"), add_project("Web")
+    for project_id in (mobile, web):
+        response = client.post("/api/tags", json={"name": "release", "color": "green", "project_id": project_id},
+                               headers=auth())
+        assert response.status_code == 201
+    assert client.post("/api/tags", json={"name": "release", "color": "green", "project_id": web},
+                       headers=auth()).status_code == 400
+    # Shared tags are listed in every project, so they clash with project tags of the same name
+    assert client.post("/api/tags", json={"name": "bug", "color": "red", "project_id": web},
+                       headers=auth()).status_code == 400
+    assert client.post("/api/tags", json={"name": "release", "color": "green"}, headers=auth()).status_code == 400
+
+
+def test_database_rejects_duplicate_tag_names(data):
+    db.session.add(Tag(name="ui", project_id=add_project("Mobile")))
+    db.session.commit()
+    # Shared tags have no project, and NULLs alone would never collide
+    db.session.add(Tag(name="bug"))
+    with pytest.raises(IntegrityError):
+        db.session.commit()
+
+
+def test_project_issue_list_is_scoped(client, data):
+    other = add_project("Other")
+    make_issue(data, title="Default issue")
+    make_issue(data, title="Other issue", project_id=other)
+
+    body = client.get(f"/api/projects/{other}/issues").json
+    assert [issue["title"] for issue in body["data"]] == ["Other issue"]
+    assert client.get("/api/issues").json["total_count"] == 2
+    assert client.get("/api/projects/999/issues").status_code == 404
+
+
+def test_partitioned_issues_still_cascade(client, data, auth, postgres):
+    issue = make_issue(data, title="Partitioned")
+    db.session.add(Comment(issue_id=issue.id, author_id=data["user"], content="On the admin's issue"))
+    db.session.add(IssueTag(issue_id=issue.id, tag_id=data["bug"]))
+    db.session.commit()
+
+    assert partition_issues(4)
+    db.session.commit()
+    assert issues_partitioned() and not partition_issues(4)
+    created = client.post("/api/issues", json={"title": "After", "status_id": data["open"],
+                                               "priority_id": data["high"]}, headers=auth())
+    assert created.status_code == 201
+
+    # Deleting the author cascades to the issue in SQL; the trigger takes the
+    # comment (by another user) and the tag link with it
+    db.session.execute(text("DELETE FROM users WHERE id = :id"), {"id": data["admin"]})
+    db.session.commit()
+    assert db.session.execute(text("SELECT count(*) FROM comments")).scalar() == 0
+    assert db.session.execute(text("SELECT count(*) FROM issues_tags")).scalar() == 0
+
+    assert unpartition_issues()
+    db.session.commit()
+    assert not issues_partitioned()
+
+
+def test_tag_order_and_new_tags_are_scoped_to_the_project(client, data, auth):
+    mobile, web = add_project("Mobile"), add_project("Web")
+    created = {}
+    for project_id, name in ((mobile, "ios"), (mobile, "android"), (web, "css")):
+        response = client.post("/api/tags", json={"name": name, "color": "grey", "project_id": project_id},
+                               headers=auth())
+        created[name] = response.json
+    # Numbered after the shared tags and the project's own, not after other projects' tags
+    assert [created[name]["display_order"] for name in ("ios", "android", "css")] == [3, 4, 3]
+
+    # Web's list is the shared tags plus css; Mobile's tags need not be listed
+    order = [created["css"]["id"], data["ui"], data["bug"]]
+    response = client.put("/api/tags/order", json={"order": order, "project_id": web}, headers=auth())
+    assert response.status_code == 200 and [tag["id"] for tag in response.json] == order
+    assert client.put("/api/tags/order", json={"order": order, "project_id": mobile},
+                      headers=auth()).status_code == 400
+    assert client.put("/api/tags/order", json={"order": [data["bug"], data["ui"]]}, headers=auth()).status_code == 200
+    assert client.put("/api/tags/order", json={"order": order, "project_id": "web"}, headers=auth()).status_code == 400
@@ -0,0 +1,34 @@
+import pytest
+from conftest import make_issue
+from flask import jsonify
+
+from app.models import Issue
+from app.querybudget import QueryBudgetExceeded
+
+
+def test_responses_carry_the_statement_count(client, data):
+    response = client.get("/api/projects")
+    assert response.status_code == 200 and response.headers["X-Query-Count"] == "1"
+
+
+def test_going_over_the_budget_raises(app, client, data):
+    # get_projects runs one statement; pretend its budget is none
+    app.view_functions["main.get_projects"].query_budget = 0
+    try:
+        with pytest.raises(QueryBudgetExceeded, match="1 statements, budget is 0"):
+            client.get("/api/projects")
+    finally:
+        app.view_functions["main.get_projects"].query_budget = 1
+
+
+def test_lazy_loads_in_a_loop_are_flagged(app, client, data):
+    for title in ("One", "Two", "Three"):
+        make_issue(data, title=title)
+
+    def comment_counts():
+        # One SELECT per issue for its comments collection
+        return jsonify({issue.title: len(issue.comments) for issue in Issue.query.all()})
+
+    app.add_url_rule("/test/lazy", view_func=comment_counts)
+    with pytest.raises(QueryBudgetExceeded, match="possible N\\+1"):
+        client.get("/test/lazy")
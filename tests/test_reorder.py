@@ -0,0 +1,39 @@
+import pytest
+
+from app import db
+from app.models import Priority, Status
+
+
+def test_statuses_are_reordered_in_one_request(client, data, auth):
+    response = client.put("/api/statuses/order", json={"order": [data["closed"], data["open"]]}, headers=auth())
+    assert response.status_code == 200
+    assert response.json == [{"id": data["closed"], "name": "closed", "display_order": 1},
+                             {"id": data["open"], "name": "open", "display_order": 2}]
+    assert [status["name"] for status in client.get("/api/statuses").json] == ["closed", "open"]
+
+
+@pytest.mark.parametrize("order, error", [
+    ([True, 2], "order must be a list of ids."),
+    ("1,2", "order must be a list of ids."),
+    ([1, 1], "order contains duplicate ids."),
+])
+def test_malformed_orders_are_rejected(client, data, auth, order, error):
+    response = client.put("/api/priorities/order", json={"order": order}, headers=auth())
+    assert response.status_code == 400 and response.json["error"] == error
+
+
+def test_orders_must_list_every_id_exactly_once(client, data, auth):
+    low = Priority(name="low", display_order=2)
+    db.session.add(low)
+    db.session.commit()
+    response = client.put("/api/priorities/order", json={"order": [data["high"], 999]}, headers=auth())
+    assert response.status_code == 400
+    assert (response.json["missing"], response.json["unknown"]) == ([low.id], [999])
+    # Nothing changed
+    assert db.session.get(Priority, data["high"]).display_order == 1
+
+
+def test_only_admins_reorder(client, data, auth):
+    response = client.put("/api/statuses/order", json={"order": [data["closed"], data["open"]]}, headers=auth(data["user"]))
+    assert response.status_code == 403
+    assert db.session.get(Status, data["open"]).display_order == 1
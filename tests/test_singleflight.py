@@ -0,0 +1,67 @@
+import threading
+import time
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_the_leaders_result():
+    flight, started, release = SingleFlight(), threading.Event(), threading.Event()
+    calls, results = [], {}
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "body"
+
+    leader = threading.Thread(target=lambda: results.update(leader=flight.do("key", slow, 5)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda i=i: results.update({i: flight.do("key", slow, 5)})) for i in range(3)]
+    for thread in followers:
+        thread.start()
+    # Give the followers time to find the leader's call in flight
+    time.sleep(0.2)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == {"leader": ("body", False), 0: ("body", True), 1: ("body", True), 2: ("body", True)}
+    # The key is released once the leader finishes
+    assert flight.do("key", lambda: "again", 5) == ("again", False)
+
+
+def test_waiters_compute_themselves_after_a_timeout_or_a_failed_leader():
+    flight, started, release = SingleFlight(), threading.Event(), threading.Event()
+
+    def stuck():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("leader failed")
+
+    leader = threading.Thread(target=lambda: _swallow(flight.do, "key", stuck, 5))
+    leader.start()
+    assert started.wait(5)
+    assert flight.do("key", lambda: "own", 0.01) == ("own", False)
+
+    waiter_result = {}
+    waiter = threading.Thread(target=lambda: waiter_result.update(result=flight.do("key", lambda: "fallback", 5)))
+    waiter.start()
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+    assert waiter_result["result"] == ("fallback", False)
+
+
+def _swallow(fn, *args):
+    try:
+        fn(*args)
+    except RuntimeError:
+        pass
+
+
+def test_disabled_coalescing_calls_the_view(app, client, data):
+    app.config["SINGLE_FLIGHT_ENABLED"] = False
+    response = client.get("/api/issues")
+    assert response.status_code == 200 and "X-Coalesced" not in response.headers
@@ -0,0 +1,21 @@
+import os
+
+from check_startup import measure
+
+
+def app_startup_ms():
+    fastest, _, framework = measure(runs=5)
+    return fastest - framework
+
+
+def test_app_startup_stays_within_its_budget():
+    # The total cold start is dominated by framework imports (see
+    # check_startup.py); this guards the part the app controls. A busy
+    # machine only ever adds time, so a measurement within budget settles it.
+    budget = float(os.getenv("STARTUP_APP_BUDGET_MS", "150"))
+    measured = []
+    for _ in range(3):
+        measured.append(app_startup_ms())
+        if measured[-1] <= budget:
+            return
+    raise AssertionError(f"app startup {min(measured):.1f} ms exceeds the {budget:.0f} ms budget")
@@ -0,0 +1,56 @@
+from conftest import make_issue
+
+from app import db
+from app.changes import log_changes
+from app.models import Issue, IssueTag, Tag
+from app.tag_index import tag_index
+
+
+def test_tag_filters_follow_writes(client, data):
+    tagged = make_issue(data, title="Tagged")
+    tagged.tags = [db.session.get(Tag, data["bug"])]
+    db.session.commit()
+    assert tag_index.candidates([data["bug"]]) == [tagged.id]
+
+    db.session.delete(tagged)
+    db.session.commit()
+    assert tag_index.candidates([data["bug"]]) == []
+
+
+def test_warm_builds_the_index_and_catch_up_moves_retagged_issues(app, data):
+    issue = make_issue(data, title="Retagged")
+    issue.tags = [db.session.get(Tag, data["bug"])]
+    db.session.commit()
+    tag_index.warm()
+    assert tag_index.token is not None and tag_index.issue_tags == {issue.id: [data["bug"]]}
+
+    issue.tags = [db.session.get(Tag, data["ui"])]
+    db.session.commit()
+    assert tag_index.candidates([data["bug"]]) == []
+    assert tag_index.candidates([data["ui"]]) == [issue.id]
+    assert tag_index.tag_counts() == {data["ui"]: 1}
+
+
+def test_change_committed_after_a_higher_one_is_replayed(client, data, postgres):
+    make_issue(data, title="Existing")
+    assert tag_index.candidates([data["bug"]]) == []
+
+    # The first writer takes the lower change id and txid but commits last
+    early = db.engine.connect()
+    transaction = early.begin()
+    issue_id = early.execute(Issue.__table__.insert().values(
+        title="Committed late", project_id=data["project"], status_id=data["open"],
+        priority_id=data["high"], author_id=data["admin"]
+    ).returning(Issue.id)).scalar()
+    early.execute(IssueTag.__table__.insert().values(issue_id=issue_id, tag_id=data["bug"]))
+    with db.Session(bind=early) as session:
+        log_changes(session, [(("issue", issue_id, issue_id), "upsert")])
+    later = make_issue(data, title="Committed first")
+    db.session.add(IssueTag(issue_id=later.id, tag_id=data["bug"]))
+    db.session.commit()
+
+    assert tag_index.candidates([data["bug"]]) == []
+
+    transaction.commit()
+    early.close()
+    assert sorted(tag_index.candidates([data["bug"]])) == sorted([issue_id, later.id])
@@ -0,0 +1,74 @@
+import time
+
+from flask_jwt_extended import create_access_token, create_refresh_token
+
+from app import db
+from app.models import RevokedToken, User
+from app.tokens import revocations
+
+
+def login(client, email="member@example.com", password="s3cret"):
+    return client.post("/api/login", json={"email": email, "password": password})
+
+
+def refresh(client, token):
+    return client.post("/api/token/refresh", headers={"Authorization": f"Bearer {token}"})
+
+
+def member(app):
+    user = User(name="Member", email="member@example.com")
+    user.set_password("s3cret")
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def test_refresh_tokens_rotate_and_work_once(app, client):
+    member(app)
+    first = login(client).json["refresh_token"]
+
+    rotated = refresh(client, first)
+    assert rotated.status_code == 200 and {"access_token", "refresh_token"} <= set(rotated.json)
+    # Replaying the used token fails, even once it has left this worker's memory
+    assert refresh(client, first).status_code == 401
+    revocations._revoked.clear()
+    assert refresh(client, first).status_code == 401
+
+    second = rotated.json["refresh_token"]
+    assert refresh(client, second).status_code == 200
+    assert RevokedToken.query.count() == 2
+
+
+def test_logout_revokes_the_refresh_token(app, client):
+    member(app)
+    token = login(client).json["refresh_token"]
+    assert client.post("/api/logout", headers={"Authorization": f"Bearer {token}"}).status_code == 200
+    assert refresh(client, token).status_code == 401
+
+
+def test_access_tokens_cannot_refresh(app, client):
+    member(app)
+    access = login(client).json["access_token"]
+    assert refresh(client, access).status_code == 422
+
+
+def test_changing_the_password_revokes_earlier_refresh_tokens(app, client):
+    user_id = member(app)
+    an_hour_ago = int(time.time()) - 3600
+    with app.test_request_context():
+        earlier = create_refresh_token(identity=str(user_id), additional_claims={"iat": an_hour_ago})
+        access = create_access_token(identity=str(user_id))
+    assert refresh(client, earlier).status_code == 200
+
+    with app.test_request_context():
+        earlier = create_refresh_token(identity=str(user_id), additional_claims={"iat": an_hour_ago})
+    response = client.put(f"/api/users/{user_id}", json={"password": "n3w"}, headers={"Authorization": f"Bearer {access}"})
+    assert response.status_code == 200
+    assert refresh(client, earlier).status_code == 401
+
+    # Logging in with the new password right away still works
+    assert refresh(client, login(client, password="n3w").json["refresh_token"]).status_code == 200
+    # Renaming doesn't sign anyone out
+    fresh = login(client, password="n3w").json["refresh_token"]
+    client.put(f"/api/users/{user_id}", json={"name": "Renamed"}, headers={"Authorization": f"Bearer {access}"})
+    assert refresh(client, fresh).status_code == 200
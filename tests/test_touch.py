@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+from conftest import make_issue
+
+from app import db
+from app.models import Issue
+from app.touch import issue_touch
+
+OLD = datetime(2000, 1, 1)
+
+
+def updated_at(issue_id):
+    db.session.expire_all()
+    return db.session.get(Issue, issue_id).updated_at
+
+
+def test_inline_touch_updates_the_issue_with_the_comment(client, data, auth):
+    issue_id = make_issue(data, updated_at=OLD).id
+    assert client.post(f"/api/issues/{issue_id}/comments", json={"content": "Hi"}, headers=auth()).status_code == 201
+    assert updated_at(issue_id) > OLD
+
+
+def test_buffered_touches_are_coalesced_into_one_flush(app, client, data, auth, postgres):
+    app.config.update(ISSUE_TOUCH_MODE="buffered", ISSUE_TOUCH_FLUSH_MS=60_000)
+    first, second = make_issue(data, updated_at=OLD).id, make_issue(data, updated_at=OLD).id
+    for issue_id in (first, first, second):
+        assert client.post(f"/api/issues/{issue_id}/comments", json={"content": "Hi"}, headers=auth()).status_code == 201
+    # Nothing is written until the flush
+    assert updated_at(first) == updated_at(second) == OLD
+
+    assert issue_touch.flush() == 2
+    assert updated_at(first) > OLD and updated_at(second) > OLD
+    assert issue_touch.flush() == 0
+
+
+def test_buffered_flush_never_moves_updated_at_back(app, client, data, auth, postgres):
+    app.config.update(ISSUE_TOUCH_MODE="buffered", ISSUE_TOUCH_FLUSH_MS=60_000)
+    later = datetime.now() + timedelta(days=1)
+    issue_id = make_issue(data, updated_at=later).id
+    assert client.post(f"/api/issues/{issue_id}/comments", json={"content": "Hi"}, headers=auth()).status_code == 201
+
+    assert issue_touch.flush() == 1
+    # GREATEST keeps the newer timestamp written in the meantime
+    assert updated_at(issue_id) == later
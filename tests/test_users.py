@@ -0,0 +1,33 @@
+from app import db
+from app.models import User
+
+
+def add_users(*names):
+    db.session.add_all([User(name=name, email=f"{name.lower().replace(' ', '.')}@example.com", password_hash="secret")
+                        for name in names])
+    db.session.commit()
+
+
+def test_users_are_paged_in_name_order(client, data, auth):
+    add_users("Carol", "Bob", "Dave")
+    body = client.get("/api/users?skip=1&limit=2", headers=auth()).json
+    assert (body["total_count"], body["skip"], body["limit"]) == (5, 1, 2)
+    assert [user["name"] for user in body["data"]] == ["Bob", "Carol"]
+    assert set(body["data"][0]) == {"id", "name", "email"}
+
+    # Out-of-range paging is clamped rather than refused
+    body = client.get("/api/users?skip=-5&limit=1000", headers=auth()).json
+    assert (body["skip"], body["limit"], len(body["data"])) == (0, 100, 5)
+
+
+def test_search_matches_name_or_email_prefixes(client, data, auth):
+    add_users("Carol King", "Bob", "100% Real", "100 Fake")
+    def names(q):
+        return [user["name"] for user in client.get("/api/users", query_string={"q": q}, headers=auth()).json["data"]]
+
+    assert names("car") == ["Carol King"]
+    assert names("BOB@") == ["Bob"]
+    assert names("king") == []
+    # LIKE wildcards in the search are matched literally
+    assert names("100%") == ["100% Real"]
+    assert names("_") == []